@@ -19,6 +19,7 @@ CREATE TABLE IF NOT EXISTS products (
 -- Create index for faster searches
 CREATE INDEX IF NOT EXISTS idx_products_in_stock ON products(in_stock);
 CREATE INDEX IF NOT EXISTS idx_products_module ON products(module);
+CREATE INDEX IF NOT EXISTS idx_products_module_stock_check ON products(module, in_stock, last_check);
 
 -- Stores table
 CREATE TABLE IF NOT EXISTS stores (
@@ -104,6 +105,8 @@ CREATE TABLE IF NOT EXISTS tasks (
 -- Create index for task processing
 CREATE INDEX IF NOT EXISTS idx_tasks_status_priority ON tasks(status, priority);
 CREATE INDEX IF NOT EXISTS idx_tasks_module ON tasks(module);
+CREATE INDEX IF NOT EXISTS idx_tasks_pending ON tasks(priority DESC, scheduled_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_tasks_pending_module ON tasks(module, priority DESC, scheduled_at) WHERE status = 'pending';
 
 -- Session cookies
 CREATE TABLE IF NOT EXISTS cookies (
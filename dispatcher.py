@@ -13,7 +13,9 @@ import threading
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Mapping, Optional, Any
+
+from utils.config_loader import load_module_targets
 
 logger = logging.getLogger("Dispatcher")
 
@@ -198,7 +200,7 @@ class ModuleDispatcher:
             logger.error(f"Error loading module {module_name}: {str(e)}")
             return False
 
-    def load_module_targets(self, module_name: str) -> Dict[str, Any]:
+    def load_module_targets(self, module_name: str) -> Mapping[str, Any]:
         """
         Load all target configurations for a specific module
 
@@ -206,53 +208,9 @@ class ModuleDispatcher:
             module_name: Name of the module
 
         Returns:
-            Dict with all target configurations
+            Mapping with all target configurations, read on first access
         """
-        targets = {
-            "urls": [],
-            "pids": [],
-            "keywords": []
-        }
-
-        # Get the project root directory
-        root_dir = Path(__file__).resolve().parent
-        
-        # Define paths
-        base_path = root_dir / "config/targets" / module_name
-
-        # Load URLs if available
-        url_file = base_path / "urls.json"
-        if url_file.exists():
-            try:
-                with open(url_file, "r") as f:
-                    url_data = json.load(f)
-                    targets["urls"] = url_data.get("urls", [])
-                    targets["search_urls"] = url_data.get("search_urls", [])
-                    targets["item_urls"] = url_data.get("item_urls", [])
-            except Exception as e:
-                logger.error(f"Error loading URLs for {module_name}: {str(e)}")
-
-        # Load PIDs if available
-        pid_file = base_path / "pid_list.json"
-        if pid_file.exists():
-            try:
-                with open(pid_file, "r") as f:
-                    pid_data = json.load(f)
-                    targets["pids"] = pid_data.get("pids", [])
-            except Exception as e:
-                logger.error(f"Error loading PIDs for {module_name}: {str(e)}")
-
-        # Load keywords if available
-        keyword_file = base_path / "keywords.json"
-        if keyword_file.exists():
-            try:
-                with open(keyword_file, "r") as f:
-                    keyword_data = json.load(f)
-                    targets["keywords"] = keyword_data.get("keywords", [])
-            except Exception as e:
-                logger.error(f"Error loading keywords for {module_name}: {str(e)}")
-
-        return targets
+        return load_module_targets(module_name)
 
     def start_module(self, module_name: str) -> str:
         """
@@ -86,7 +86,7 @@ def ensure_package_structure():
 ensure_package_structure()
 
 try:
-    from utils.config_loader import load_global_config
+    from utils.config_loader import load_global_config, preload_all_configs
 except ImportError:
     print(f"{Fore.RED}Error: Could not import utils.config_loader.{Style.RESET_ALL}")
     print(f"{Fore.YELLOW}Make sure you have utils/__init__.py file.{Style.RESET_ALL}")
@@ -847,6 +847,9 @@ def main():
     # Load configuration
     load_config()
 
+    # Warm the config caches before any module starts
+    preload_all_configs()
+
     # Override config with command line args
     if args.no_proxies:
         config['use_proxies'] = False
@@ -57,7 +57,7 @@ except ImportError:
             pass
 
 
-    def get_cloudflare_bypass(base_url, cookie_file=None):
+    def get_cloudflare_bypass(base_url, cookie_file=None, **kwargs):
         return CloudflareBypass(cookie_file="", base_url=base_url, target_page="/")
 
 try:
@@ -97,6 +97,18 @@ except ImportError:
 # Configure module logger
 logger = logging.getLogger("Booksamillion")
 
+# Base retry delays in seconds (1.5 * 2**attempt), jitter is applied per attempt;
+# attempts past the end of the table reuse the last entry
+_RETRY_SCHEDULE = (1.5, 3.0, 6.0, 12.0, 24.0)
+
+# JSON objects the inventory endpoint may embed in an HTML response, tried in
+# order; each pattern only runs when its literal marker is present
+_EMBEDDED_JSON_PATTERNS = (
+    ('{"userinfo":', re.compile(r'({"userinfo":.*?})', re.DOTALL)),
+    ('{"pidinfo":', re.compile(r'({"pidinfo":.*?})', re.DOTALL)),
+    ('{"Error":', re.compile(r'({"Error":[0-9]+,"ErrorText":".*?"})', re.DOTALL)),
+)
+
 # Reduce verbosity of other loggers
 logging.getLogger("CloudflareBypass").setLevel(logging.WARNING)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -142,10 +154,16 @@ class Booksamillion:
         if not os.path.isabs(cookie_file):
             cookie_file = os.path.join(self.project_root, cookie_file)
 
+        transport = self.config.get("transport", "requests")
+        if transport not in ("requests", "httpx"):
+            logger.warning(f"Unknown transport {transport!r} in config, using requests")
+            transport = "requests"
+
         self.cf_bypass = get_cloudflare_bypass(
             base_url="https://www.booksamillion.com",
             cookie_file=cookie_file,
-            cookie_max_age=3600  # Keep cookies valid for 1 hour
+            cookie_max_age=3600,  # Keep cookies valid for 1 hour
+            transport=transport
         )
 
         # Configure CloudflareBypass to use correct project root for logs
@@ -926,9 +944,10 @@ class Booksamillion:
         """
         logger.info(f"Checking stock for {pid}")
 
-        # Setup proxy if provided
+        # Setup proxy if provided, on the bypass's session: get()/post() route
+        # through its proxies on either transport
         if proxy and isinstance(proxy, dict) and proxy.get('http'):
-            self.session.proxies.update(proxy)
+            self.cf_bypass.session.proxies.update(proxy)
 
         # Initialize result template
         result = {
@@ -976,7 +995,6 @@ class Booksamillion:
 
         # Make request with retry mechanism
         max_retries = self.config.get("retry_attempts", 3)
-        backoff_base = 1.5
 
         for attempt in range(max_retries):
             try:
@@ -996,19 +1014,20 @@ class Booksamillion:
                 logger.warning(f"Got status code {response.status_code} on attempt {attempt + 1}")
 
                 # Refresh session only if we hit a cloudflare challenge
-                if "challenge" in response.text.lower() or response.status_code == 403:
+                # (status first; otherwise only a bytes prefix of the body is scanned)
+                if response.status_code == 403 or b"challenge" in response.content[:4096].lower():
                     logger.info("Refreshing cookies due to Cloudflare challenge")
                     self.cf_bypass.refresh_session()
 
                 # Calculate backoff with jitter
-                wait_time = backoff_base * (2 ** attempt) * (0.75 + 0.5 * random.random())
+                wait_time = _RETRY_SCHEDULE[min(attempt, len(_RETRY_SCHEDULE) - 1)] * (0.75 + 0.5 * random.random())
                 time.sleep(min(wait_time, 30))  # Cap at 30 seconds
 
             except Exception as e:
                 logger.error(f"Request error on attempt {attempt + 1}: {str(e)}")
 
                 # Exponential backoff with jitter
-                wait_time = backoff_base * (2 ** attempt) * (0.75 + 0.5 * random.random())
+                wait_time = _RETRY_SCHEDULE[min(attempt, len(_RETRY_SCHEDULE) - 1)] * (0.75 + 0.5 * random.random())
                 time.sleep(min(wait_time, 30))
 
                 # Refresh session before next attempt
@@ -1024,27 +1043,24 @@ class Booksamillion:
             try:
                 stock_data = response.json()
             except:
-                # Try to extract JSON from HTML
-                json_match = re.search(r'({"userinfo":.*?})', response.text, re.DOTALL)
+                # Try to extract JSON from HTML (decode once, and only run a
+                # pattern when its literal prefix is actually in the body)
+                text = response.text
+                json_match = None
+                for marker, pattern in _EMBEDDED_JSON_PATTERNS:
+                    if marker in text:
+                        json_match = pattern.search(text)
+                        if json_match:
+                            break
+
                 if json_match:
                     json_text = json_match.group(1)
                     stock_data = json.loads(json_text)
+                    if "ErrorText" in stock_data:
+                        logger.warning(f"Error from API: {stock_data['ErrorText']}")
                 else:
-                    # Try alternate pattern
-                    json_match = re.search(r'({"pidinfo":.*?})', response.text, re.DOTALL)
-                    if json_match:
-                        json_text = json_match.group(1)
-                        stock_data = json.loads(json_text)
-                    else:
-                        json_match = re.search(r'({"Error":[0-9]+,"ErrorText":".*?"})', response.text, re.DOTALL)
-                        if json_match:
-                            json_text = json_match.group(1)
-                            stock_data = json.loads(json_text)
-                            if "ErrorText" in stock_data:
-                                logger.warning(f"Error from API: {stock_data['ErrorText']}")
-                        else:
-                            logger.error(f"Could not find JSON data in response for {pid}")
-                            return result
+                    logger.error(f"Could not find JSON data in response for {pid}")
+                    return result
 
             # Check for API error
             if "Error" in stock_data and stock_data.get("Error") != 0:
@@ -1250,9 +1266,10 @@ class Booksamillion:
         """
         logger.info("Scanning for new Pokemon products")
 
-        # Setup proxy if provided
+        # Setup proxy if provided, on the bypass's session: get()/post() route
+        # through its proxies on either transport
         if proxy and isinstance(proxy, dict) and proxy.get('http'):
-            self.session.proxies.update(proxy)
+            self.cf_bypass.session.proxies.update(proxy)
 
         new_products = []
         search_urls = self.config.get("search_urls", [])
@@ -8,6 +8,7 @@ import random
 import time
 import logging
 import json
+from types import MappingProxyType
 from typing import Dict, Any, Optional, Tuple, List, Union
 
 import requests
@@ -30,10 +31,14 @@ from utils.headers import get_default_headers
 
 logger = logging.getLogger("BypassUtils")
 
+# Default headers generated once at import; pass rotate_ua=True for a fresh set
+_DEFAULT_HEADERS = MappingProxyType(get_default_headers())
+
 
 def get_client_session(client_type: str = "requests",
                        browser: str = "chrome_110",
-                       headers: Optional[Dict[str, str]] = None) -> Any:
+                       headers: Optional[Dict[str, str]] = None,
+                       rotate_ua: bool = False) -> Any:
     """
     Get a client session object based on the specified type.
 
@@ -41,11 +46,17 @@ def get_client_session(client_type: str = "requests",
         client_type: Type of client to create ("requests", "cloudscraper", or "tls_client")
         browser: Browser profile for tls_client (if used)
         headers: Optional headers to set on the session
+        rotate_ua: Generate fresh default headers (new random user agent) instead of the cached set
 
     Returns:
         Session object
     """
-    client_headers = headers or get_default_headers()
+    if headers:
+        client_headers = headers
+    elif rotate_ua:
+        client_headers = get_default_headers()
+    else:
+        client_headers = _DEFAULT_HEADERS
 
     if client_type == "cloudscraper":
         if not CLOUDSCRAPER_AVAILABLE:
@@ -6,39 +6,345 @@ Fixes both TLS Client timeout issue and adds additional browser fingerprinting
 
 import time
 import logging
-import random
 import json
 import re
 import os
+import functools
+import importlib.util
+import contextlib
+import threading
+import weakref
+import queue
+import atexit
+import hashlib
+from collections import deque
 from pathlib import Path
+from types import MappingProxyType
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import cookiejar_from_dict
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
 
-# Try to import optional dependencies
+# Platform-specific file locking for the shared cookie file
 try:
-    import cloudscraper
+    import fcntl
+except ImportError:
+    fcntl = None
 
-    CLOUDSCRAPER_AVAILABLE = True
+try:
+    import msvcrt
 except ImportError:
-    CLOUDSCRAPER_AVAILABLE = False
-    print("CloudScraper not available. Some features may be limited.")
+    msvcrt = None
 
+# Faster JSON for the cookie file when available
 try:
-    import tls_client
+    import orjson
+except ImportError:
+    orjson = None
 
-    TLS_CLIENT_AVAILABLE = True
+# Faster hashing for the request log's duplicate check when available
+try:
+    import xxhash
 except ImportError:
-    TLS_CLIENT_AVAILABLE = False
-    print("TLS Client not available. Some features may be limited.")
+    xxhash = None
+
+
+# Optional dependencies are imported lazily on first use so that callers
+# relying on cached cookies don't pay their import cost
+@functools.lru_cache(maxsize=None)
+def _has_cloudscraper():
+    """Check whether cloudscraper is installed without importing it"""
+    available = importlib.util.find_spec("cloudscraper") is not None
+    if not available:
+        logger.warning("CloudScraper not available. Some features may be limited.")
+    return available
+
+
+@functools.lru_cache(maxsize=None)
+def _has_tls_client():
+    """Check whether tls_client is installed without importing it"""
+    available = importlib.util.find_spec("tls_client") is not None
+    if not available:
+        logger.warning("TLS Client not available. Some features may be limited.")
+    return available
+
+
+@functools.lru_cache(maxsize=None)
+def _has_httpx():
+    """Check whether httpx with HTTP/2 support (h2) is installed without importing it"""
+    available = (importlib.util.find_spec("httpx") is not None
+                 and importlib.util.find_spec("h2") is not None)
+    if not available:
+        logger.warning("httpx[http2] not available. Falling back to requests transport.")
+    return available
+
+
+@functools.lru_cache(maxsize=1)
+def _import_cloudscraper():
+    import cloudscraper
+    return cloudscraper
+
+
+@functools.lru_cache(maxsize=1)
+def _import_tls_client():
+    import tls_client
+    return tls_client
+
+
+@functools.lru_cache(maxsize=1)
+def _import_httpx():
+    import httpx
+    return httpx
+
 
 # Configure logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("CloudflareBypass")
 
+# Transport-level retry policy mounted on every session. 403/429/503 are left
+# out because those are Cloudflare challenge responses, which are handled by
+# refreshing cookies rather than by blind retries.
+RETRY_POLICY = Retry(
+    total=3,
+    backoff_factor=1.5,
+    status_forcelist=(500, 502, 504),
+    allowed_methods=frozenset(['GET', 'POST']),
+    raise_on_status=False
+)
+
+# Attempts per request when the response is a Cloudflare challenge; cookies
+# are refreshed between them
+CHALLENGE_ATTEMPTS = 2
+
+# requests keyword arguments that httpx only accepts on the client, or not at all
+_REQUESTS_ONLY_KWARGS = frozenset(['verify', 'cert', 'stream', 'hooks'])
+
+# Connection pool size for the long-lived requests session
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 20
+
+# Browser headers, built once at import. _SESSION_HEADERS goes on the main
+# session; the other two match the fingerprint each cookie method presents.
+_SESSION_HEADERS = MappingProxyType({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.7049.118 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "sec-ch-ua": '"Google Chrome";v="135", "Not-A.Brand";v="8", "Chromium";v="135"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    # Extra spoof headers to look more like real browser
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Sec-Fetch-User": "?1",
+    "Cache-Control": "max-age=0",
+    "Pragma": "no-cache"
+})
+
+_CLOUDSCRAPER_HEADERS = MappingProxyType({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Cache-Control': 'max-age=0',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'sec-ch-ua': '"Google Chrome";v="135", "Not-A.Brand";v="8", "Chromium";v="135"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"Windows"',
+    'Upgrade-Insecure-Requests': '1',
+    'Content-Type': 'application/x-www-form-urlencoded',
+    'DNT': '1',
+    'Pragma': 'no-cache'
+})
+
+_TLS_CLIENT_HEADERS = MappingProxyType({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "sec-ch-ua": '"Google Chrome";v="112", "Chromium";v="112", "Not-A.Brand";v="99"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "Upgrade-Insecure-Requests": "1"
+})
+
+# Status codes Cloudflare uses for challenge / block pages
+CHALLENGE_STATUS_CODES = (403, 503, 429)
+
+# Challenge pages are small; anything larger is treated as real content
+CHALLENGE_MAX_CONTENT_LENGTH = 4096
+
+# Challenge markup appears near the top of the page, so only a prefix is scanned
+CHALLENGE_SCAN_BYTES = 2048
+_CHALLENGE_RE = re.compile(rb'(?i)(cf-chl|challenge-platform|__cf_chl|cloudflare.*challenge)')
+
+# Characters not allowed in log filenames, mapped to '_'
+_FNAME_TRANS = str.maketrans({c: '_' for c in '\\/*?:"<>|'})
+
+# Marker of the JSON object some endpoints embed in an HTML response
+_USERINFO_MARKER = '{"userinfo":'
+_USERINFO_MARKER_BYTES = _USERINFO_MARKER.encode()
+
+
+def _is_cloudflare_challenge(response):
+    """Detect a Cloudflare challenge from status code and headers without decoding the body"""
+    if response.status_code not in CHALLENGE_STATUS_CODES:
+        return False
+
+    # Cloudflare marks challenge responses explicitly
+    if 'cf-mitigated' in response.headers:
+        return True
+
+    try:
+        content_length = int(response.headers.get('content-length', '0'))
+    except ValueError:
+        content_length = 0
+
+    if content_length >= CHALLENGE_MAX_CONTENT_LENGTH:
+        return False
+
+    # Small body - scan a bounded prefix of the bytes instead of decoding the text
+    return _CHALLENGE_RE.search(response.content[:CHALLENGE_SCAN_BYTES]) is not None
+
+
+def _json_dumps(data):
+    """Serialize data to compact JSON bytes, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads(data):
+    """Parse JSON bytes, using orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _extract_userinfo_json(text):
+    """Return the {"userinfo": ...} object embedded in an HTML page, or None.
+
+    Walks forward from the marker counting braces (ignoring braces inside
+    string literals), so the scan is a single linear pass with no regex
+    backtracking on large bodies.
+    """
+    start = text.find(_USERINFO_MARKER)
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    return None
+
+
+def _apply_retry_policy(session):
+    """Use RETRY_POLICY on all of a session's adapters.
+
+    The existing adapters are updated in place rather than replaced, since
+    cloudscraper mounts its own TLS-fingerprinting adapter.
+    """
+    for adapter in session.adapters.values():
+        adapter.max_retries = RETRY_POLICY
+
+
+@contextlib.contextmanager
+def _cookie_file_lock(cookie_file, shared=False):
+    """Hold an inter-process lock on a sidecar .lock file next to the cookie file"""
+    lock_path = cookie_file.with_name(cookie_file.name + '.lock')
+    with open(lock_path, 'a+b') as lock_fh:
+        if fcntl:
+            fcntl.flock(lock_fh, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        elif msvcrt:
+            lock_fh.seek(0)
+            msvcrt.locking(lock_fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_fh, fcntl.LOCK_UN)
+            elif msvcrt:
+                lock_fh.seek(0)
+                msvcrt.locking(lock_fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _strip_scheme(url):
+    """Drop a leading http:// or https://"""
+    if url.startswith('https://'):
+        return url[8:]
+    if url.startswith('http://'):
+        return url[7:]
+    return url
+
+
+@functools.lru_cache(maxsize=2048)
+def _safe_filename(url):
+    """Convert URL to safe filename (cached, monitor loops hit the same URLs repeatedly)"""
+    # Remove protocol
+    url = _strip_scheme(url)
+
+    # Get domain and first part of path
+    parts = url.split('/')
+    domain = parts[0]
+
+    # Get the first path segment if it exists
+    path = parts[1] if len(parts) > 1 else ""
+
+    # Remove query parameters and fragments
+    path = path.split('?')[0].split('#')[0]
+
+    # Combine with max length limit
+    result = f"{domain}_{path}"
+
+    # Replace invalid characters
+    result = result.translate(_FNAME_TRANS)
+
+    # Limit length
+    if len(result) > 50:
+        result = result[:50]
+
+    return result
+
 
 class RequestLogger:
     """Simplified request logger for CloudflareBypass"""
 
+    # Max records the writer thread drains per wakeup
+    WRITE_BATCH_SIZE = 64
+
+    # How many recent response fingerprints are remembered for skipping repeated bodies
+    RECENT_HASHES = 256
+
+    # Only this much of each response body is written to the log
+    LOGGED_BODY_BYTES = 10000
+
     def __init__(self):
         self.log_dir = Path("logs/requests")
         self.enabled = True  # Default to enabled
@@ -46,102 +352,194 @@ class RequestLogger:
         # Create directory
         self.log_dir.mkdir(parents=True, exist_ok=True)
 
-    def log_from_response(self, url, method, headers, params=None, response=None, log_filename=None):
-        """Log request and response to file - with log_filename parameter"""
+        # Records are written by a background thread, started on first use
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+        # Fingerprints of recently logged responses; repeated bodies aren't written again
+        self._recent_hashes = deque()
+        self._recent_set = set()
+        self._recent_lock = threading.Lock()
+
+    def _ensure_writer(self):
+        """Start the background writer thread if it isn't running"""
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="RequestLoggerWriter", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _writer_loop(self):
+        """Drain queued log records in batches and append them to the day's log file"""
+        log_fh = None
+        log_path = None
+
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.WRITE_BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            try:
+                for filepath, content in batch:
+                    # Roll over to a new file when the date changes
+                    if filepath != log_path:
+                        if log_fh is not None:
+                            log_fh.close()
+                        log_fh = open(filepath, "a", buffering=65536, encoding="utf-8")
+                        log_path = filepath
+                    log_fh.write(content)
+                log_fh.flush()
+            except Exception as e:
+                logger.error(f"Failed to log request: {str(e)}")
+                log_fh = None
+                log_path = None
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _is_duplicate(self, url, method, response):
+        """Return True if the logged part of this response body was logged recently"""
+        key = f"{method} {url} {response.status_code}".encode('utf-8', errors='replace')
+        # Hash only the prefix that actually gets written, large bodies don't need a full pass
+        data = key + b"\0" + response.content[:self.LOGGED_BODY_BYTES]
+        if xxhash is not None:
+            digest = xxhash.xxh3_64_digest(data)
+        else:
+            digest = hashlib.blake2b(data, digest_size=8).digest()
+
+        with self._recent_lock:
+            if digest in self._recent_set:
+                return True
+
+            self._recent_hashes.append(digest)
+            self._recent_set.add(digest)
+            if len(self._recent_hashes) > self.RECENT_HASHES:
+                self._recent_set.discard(self._recent_hashes.popleft())
+            return False
+
+    def flush(self):
+        """Block until every queued log record has been written"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def log_from_response(self, url, method, headers, params=None, response=None, log_filename=None, body=None):
+        """Append a request/response record to the day's log file
+
+        log_filename labels the record. The record is queued and written by a
+        background thread, so it may not be in the returned file until flush()
+        is called. Returns None when logging is disabled. When the same
+        response body was logged recently the record is still written, but
+        with a note in place of the body. body is the already-decoded
+        response.text, if the caller has it; otherwise only the logged 10K
+        prefix of the body is decoded.
+        """
         if not self.enabled:
             return None
 
-        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        # Sample the clock once for the record label, file and timestamp
+        now = time.localtime()
+        timestamp = time.strftime("%Y%m%d-%H%M%S", now)
 
-        # Use provided log_filename if available
+        # Use provided log_filename if available to label the record
         if log_filename:
-            filename = f"{timestamp}_{method}_{log_filename}.log"
+            record_id = f"{timestamp}_{method}_{log_filename}"
         else:
-            # Create a safe filename from the URL
-            url_part = self._safe_filename(url)
-            filename = f"{timestamp}_{method}_{url_part}.log"
+            # Create a safe name from the URL
+            url_part = _safe_filename(url) if isinstance(url, str) else "unknown_url"
+            record_id = f"{timestamp}_{method}_{url_part}"
 
-        filepath = self.log_dir / filename
+        # All records of a day go to one file instead of one file per request
+        filepath = self.log_dir / f"requests-{time.strftime('%Y%m%d', now)}.log"
 
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(f"===== REQUEST: {url} =====\n")
-                f.write(f"Method: {method}\n")
-                f.write(f"Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("\n----- Request Headers -----\n")
-                f.write(f"{headers}\n")
-
-                if params:
-                    f.write("\n----- Request Parameters -----\n")
-                    f.write(f"{params}\n")
-
-                f.write("\n----- Request Data -----\n")
-                f.write("\n")
-
-                if response:
-                    f.write("\n===== RESPONSE =====\n")
-                    f.write(f"Status Code: {response.status_code}\n")
-                    f.write("\n----- Response Headers -----\n")
-                    f.write(f"{dict(response.headers)}\n")
-                    f.write("\n----- Response Body -----\n")
-                    f.write(response.text[:10000])  # Limit to first 10K chars
-                    if len(response.text) > 10000:
-                        f.write("\n... (truncated)")
+            # Format on the caller's thread into one string, write on the writer thread
+            parts = [
+                f"\n########## {record_id} ##########\n",
+                f"===== REQUEST: {url} =====\n",
+                f"Method: {method}\n",
+                f"Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S', now)}\n",
+                "\n----- Request Headers -----\n",
+            ]
+            parts.extend(f"{key}: {value}\n" for key, value in headers.items())
+
+            if params:
+                parts.append(f"\n----- Request Parameters -----\n{params}\n")
+
+            if response is not None:
+                parts.append(f"\n===== RESPONSE =====\nStatus Code: {response.status_code}\n")
+                parts.append("\n----- Response Headers -----\n")
+                parts.extend(f"{key}: {value}\n" for key, value in response.headers.items())
+                parts.append("\n----- Response Body -----\n")
+                # Polling loops see the same page over and over; only dump the body when it changes
+                if self._is_duplicate(url, method, response):
+                    parts.append("(unchanged from a recently logged response)")
+                    truncated = False
+                elif body is not None:
+                    parts.append(body[:self.LOGGED_BODY_BYTES])  # Limit to first 10K chars
+                    truncated = len(body) > self.LOGGED_BODY_BYTES
+                else:
+                    # Only decode the part that gets logged
+                    raw = response.content
+                    parts.append(raw[:self.LOGGED_BODY_BYTES].decode(response.encoding or 'utf-8', errors='replace'))
+                    truncated = len(raw) > self.LOGGED_BODY_BYTES
+                if truncated:
+                    parts.append("\n... (truncated)")
+
+            content = ''.join(parts)
 
+            self._ensure_writer()
+            self._queue.put((filepath, content))
             return str(filepath)
         except Exception as e:
             logger.error(f"Failed to log request: {str(e)}")
             return None
 
-    def _safe_filename(self, url):
-        """Convert URL to safe filename"""
-        # Extract domain and path
-        if isinstance(url, str):
-            # Remove protocol
-            url = re.sub(r'^https?://', '', url)
-
-            # Get domain and first part of path
-            parts = url.split('/')
-            domain = parts[0]
-
-            # Get the first path segment if it exists
-            path = parts[1] if len(parts) > 1 else ""
-
-            # Remove query parameters and fragments
-            path = path.split('?')[0].split('#')[0]
-
-            # Combine with max length limit
-            result = f"{domain}_{path}"
-
-            # Replace invalid characters
-            result = re.sub(r'[\\/*?:"<>|]', '_', result)
-
-            # Limit length
-            if len(result) > 50:
-                result = result[:50]
-
-            return result
-        else:
-            return "unknown_url"
-
 
 class CloudflareBypass:
     """Utility class for bypassing Cloudflare protection with improved cookie handling"""
 
+    # Live instances keyed by (base_url, cookie_file), see shared()
+    _REGISTRY = weakref.WeakValueDictionary()
+    _REGISTRY_LOCK = threading.Lock()
+
     def __init__(self, cookie_file='data/cloudflare_cookies.json', base_url='https://www.example.com', target_page='/',
-                 cookie_max_age=3600):
-        """Initialize the CloudflareBypass"""
+                 cookie_max_age=3600, transport='requests'):
+        """Initialize the CloudflareBypass
+
+        transport='httpx' sends get()/post() over an HTTP/2 httpx.Client; the
+        requests/cloudscraper session is then only used to solve challenges.
+        """
         self.cookie_file = Path(cookie_file)
         self.base_url = base_url.rstrip('/')
         self.target_page = target_page if target_page.startswith('/') else f'/{target_page}'
+        self.target_url = f"{self.base_url}{self.target_page}"
         self.cookie_max_age = cookie_max_age
         self.cookies = {}
+        # User-Agent that solved the challenge for the current cf_clearance
+        self._bound_ua = None
         self.last_cookie_refresh = 0
+        # Expiry of the in-memory cookies, checked before anything else on each request
+        self._cookies_valid_until = 0
+        # Cookie method that last produced cf_clearance (persisted in the cookie file)
+        self._last_successful_method = None
         self.failed_attempts = 0
         self.max_failed_attempts = 3
 
-        # Ensure data directory exists
-        self.cookie_file.parent.mkdir(exist_ok=True)
+        # Single cloudscraper instance shared by the session and cookie refreshes
+        self._scraper = None
+
+        # Cookie refresh methods, in default order, limited to installed backends
+        self._refresh_methods = {}
+        if _has_cloudscraper():
+            self._refresh_methods['cloudscraper'] = self._get_cookies_with_cloudscraper
+        if _has_tls_client():
+            self._refresh_methods['tls_client'] = self._get_cookies_with_tls_client
 
         # Load cookies
         self._load_cookies()
@@ -149,6 +547,13 @@ class CloudflareBypass:
         # Create session
         self.session = self._create_session()
 
+        # Optional HTTP/2 client for regular traffic, and the proxies it was built with
+        self._client = None
+        self._client_proxies = {}
+        self._client_lock = threading.Lock()
+        if transport == 'httpx' and _has_httpx():
+            self._client = self._create_http_client(self.session.proxies)
+
         # Create request logger
         self.request_logger = RequestLogger()
 
@@ -157,53 +562,112 @@ class CloudflareBypass:
 
         self.aggressive_mode = False
 
+    @classmethod
+    def shared(cls, base_url, cookie_file='data/cloudflare_cookies.json', target_page='/', cookie_max_age=3600,
+               transport='requests'):
+        """Return the live instance for this site and cookie file, creating it if needed.
+
+        Callers scraping the same host share one session, connection pool and
+        cookie state instead of each reading the cookie file and solving
+        challenges on their own. transport only applies when the instance is
+        first created.
+        """
+        key = (base_url.rstrip('/'), str(cookie_file))
+        with cls._REGISTRY_LOCK:
+            instance = cls._REGISTRY.get(key)
+            if instance is None:
+                instance = cls(cookie_file=cookie_file, base_url=base_url, target_page=target_page,
+                               cookie_max_age=cookie_max_age, transport=transport)
+                cls._REGISTRY[key] = instance
+        return instance
+
     def _load_cookies(self):
-        """Load cookies from file"""
-        if self.cookie_file.exists():
-            try:
-                with open(self.cookie_file, 'r') as f:
-                    cookie_data = json.load(f)
-
-                    # Check if cookies are still valid (not too old)
-                    stored_timestamp = cookie_data.get('timestamp', 0)
-                    cookie_age = time.time() - stored_timestamp
-
-                    if cookie_age < self.cookie_max_age:
-                        self.cookies = cookie_data.get('cookies', {})
-                        self.last_cookie_refresh = stored_timestamp
-
-                        if 'cf_clearance' in self.cookies:
-                            cookie_age_minutes = int(cookie_age / 60)
-                            logger.info(f"Loaded valid cookies from file, age: {cookie_age_minutes} minutes")
-                            return True
-                        else:
-                            logger.info("Stored cookies don't have cf_clearance, generating new ones")
+        """Load cookies from file, using the file's mtime as the cookie age"""
+        try:
+            cookie_mtime = self.cookie_file.stat().st_mtime
+        except OSError:
+            cookie_mtime = None
+
+        if cookie_mtime is not None:
+            cookie_age = time.time() - cookie_mtime
+
+            # Stale files are rejected without parsing them
+            if cookie_age >= self.cookie_max_age:
+                logger.info(
+                    f"Cookies expired (age: {int(cookie_age / 60)} minutes, max: {int(self.cookie_max_age / 60)} minutes)")
+            else:
+                try:
+                    cookie_data = self._read_cookie_data(raise_errors=True)
+
+                    self.cookies = cookie_data.get('cookies', {})
+                    self._bound_ua = cookie_data.get('user_agent')
+                    self._last_successful_method = cookie_data.get('last_successful_method')
+                    self.last_cookie_refresh = cookie_mtime
+                    self._cookies_valid_until = cookie_mtime + self.cookie_max_age
+
+                    # cf_clearance is only honoured with the User-Agent that obtained it
+                    if 'cf_clearance' in self.cookies and not self._bound_ua:
+                        logger.info("Stored cf_clearance isn't bound to a User-Agent, generating new cookies")
+                    elif 'cf_clearance' in self.cookies:
+                        cookie_age_minutes = int(cookie_age / 60)
+                        logger.info(f"Loaded valid cookies from file, age: {cookie_age_minutes} minutes")
+                        return True
                     else:
-                        logger.info(
-                            f"Cookies expired (age: {int(cookie_age / 60)} minutes, max: {int(self.cookie_max_age / 60)} minutes)")
+                        logger.info("Stored cookies don't have cf_clearance, generating new ones")
 
-            except Exception as e:
-                logger.error(f"Error loading cookies: {str(e)}")
+                except Exception as e:
+                    logger.error(f"Error loading cookies: {str(e)}")
 
         logger.info("No valid cookies found, will generate new ones")
         self.cookies = {}
+        self._bound_ua = None
         self.last_cookie_refresh = 0
+        self._cookies_valid_until = 0
         return False
 
-    def _save_cookies(self, cookies):
-        """Save cookies to file with timestamp"""
+    def _read_cookie_data(self, raise_errors=False):
+        """Read and parse the cookie file under a shared lock"""
+        try:
+            with _cookie_file_lock(self.cookie_file, shared=True), open(self.cookie_file, 'rb') as f:
+                data = f.read()
+            return _json_loads(data)
+        except Exception:
+            if raise_errors:
+                raise
+            return {}
+
+    def _save_cookies(self, cookies, user_agent=None, method=None):
+        """Save cookies together with the User-Agent and method that obtained them.
+
+        The file's mtime records when the cookies were obtained.
+        """
         try:
             now = time.time()
+
+            # Remember which method produced cf_clearance so it is tried first next time
+            if method and 'cf_clearance' in cookies:
+                self._last_successful_method = method
+
             cookie_data = {
-                'timestamp': now,
-                'cookies': cookies
+                'cookies': cookies,
+                'user_agent': user_agent,
+                'last_successful_method': self._last_successful_method
             }
-            with open(self.cookie_file, 'w') as f:
-                json.dump(cookie_data, f, indent=2)
+            # Only the writer needs the data directory to exist
+            self.cookie_file.parent.mkdir(parents=True, exist_ok=True)
+
+            # Write to a temp file and rename so readers never see a partial file
+            tmp_file = self.cookie_file.with_name(self.cookie_file.name + '.tmp')
+            with _cookie_file_lock(self.cookie_file):
+                with open(tmp_file, 'wb') as f:
+                    f.write(_json_dumps(cookie_data))
+                os.replace(tmp_file, self.cookie_file)
 
             # Update internal state
             self.cookies = cookies
+            self._bound_ua = user_agent
             self.last_cookie_refresh = now
+            self._cookies_valid_until = now + self.cookie_max_age
 
             logger.info("Saved cookies to file")
             return True
@@ -211,50 +675,49 @@ class CloudflareBypass:
             logger.error(f"Error saving cookies: {str(e)}")
             return False
 
-    def _create_session(self):
-        """Create a request session with appropriate headers and cookies"""
-        if CLOUDSCRAPER_AVAILABLE:
-            session = cloudscraper.create_scraper(
+    def _get_scraper(self):
+        """Return the shared cloudscraper instance, creating it on first use"""
+        if self._scraper is None:
+            cloudscraper = _import_cloudscraper()
+            self._scraper = cloudscraper.create_scraper(
                 browser={
                     'browser': 'chrome',
                     'platform': 'windows',
                     'desktop': True,
                     'mobile': False
-                }
+                },
+                delay=3,  # Add a delay between requests
+                interpreter='nodejs'  # Try using nodejs interpreter
             )
             logger.info("Created CloudScraper session")
+        return self._scraper
+
+    def _create_session(self):
+        """Create the long-lived request session with appropriate headers and cookies.
+
+        Called once from __init__; later refreshes only swap cookies on this
+        session (see _sync_session_cookies) so its connection pool stays warm.
+        """
+        if _has_cloudscraper():
+            session = self._get_scraper()
         else:
             session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                                  max_retries=RETRY_POLICY)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
             logger.info("Created regular requests session")
 
-        # Add headers
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.7049.118 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "sec-ch-ua": '"Google Chrome";v="135", "Not-A.Brand";v="8", "Chromium";v="135"',
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": '"Windows"',
-            "DNT": "1",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1"
-        }
-        session.headers.update(headers)
-
-        # Extra spoof headers to look more like real browser
-        session.headers.update({
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "none",
-            "Sec-Fetch-User": "?1",
-            "Cache-Control": "max-age=0",
-            "Pragma": "no-cache"
-        })
+        session.headers.update(_SESSION_HEADERS)
+
+        # Keep the User-Agent that cf_clearance was issued to
+        if self._bound_ua:
+            session.headers["User-Agent"] = self._bound_ua
+
+        _apply_retry_policy(session)
 
         # Add cookies if we have any
-        for name, value in self.cookies.items():
-            session.cookies.set(name, value)
+        cookiejar_from_dict(self.cookies, cookiejar=session.cookies, overwrite=True)
 
         # Log cookie status
         if 'cf_clearance' in self.cookies:
@@ -265,8 +728,75 @@ class CloudflareBypass:
 
         return session
 
+    def _create_http_client(self, proxies=None):
+        """Create an HTTP/2 httpx client carrying the session's headers and cookies.
+
+        proxies is a requests-style mapping ({'http': url, 'https': url},
+        'all' or 'scheme://host' keys); each entry becomes an httpx mount.
+        """
+        httpx = _import_httpx()
+
+        def transport(proxy=None):
+            return httpx.HTTPTransport(
+                http2=True,
+                retries=RETRY_POLICY.total,
+                limits=httpx.Limits(max_connections=POOL_MAXSIZE, max_keepalive_connections=POOL_CONNECTIONS),
+                proxy=proxy
+            )
+
+        proxies = {key: url for key, url in (proxies or {}).items() if url}
+        mounts = {(key if '://' in key else f"{key}://"): transport(url) for key, url in proxies.items()}
+
+        client = httpx.Client(
+            http2=True,
+            timeout=20,
+            follow_redirects=True,
+            headers=dict(self.session.headers),
+            cookies=self.cookies,
+            transport=transport(),
+            mounts=mounts or None
+        )
+        self._client_proxies = proxies
+        logger.info(f"Created httpx HTTP/2 client{' with proxies' if mounts else ''}")
+        return client
+
+    def _http_client_for(self, proxies):
+        """Get the httpx client, rebuilding it if the proxies to route through have changed"""
+        proxies = {key: url for key, url in proxies.items() if url}
+        with self._client_lock:
+            if proxies != self._client_proxies:
+                self._client = self._create_http_client(proxies)
+            return self._client
+
+    def _sync_http_client(self):
+        """Copy the current cookies and User-Agent onto the httpx client, if one is in use"""
+        if self._client is None:
+            return
+
+        self._client.cookies.clear()
+        for name, value in self.cookies.items():
+            self._client.cookies.set(name, value)
+
+        if self._bound_ua:
+            self._client.headers["User-Agent"] = self._bound_ua
+
+    def _sync_session_cookies(self):
+        """Replace the session's cookies with the current ones without rebuilding the session"""
+        self.session.cookies.clear()
+        cookiejar_from_dict(self.cookies, cookiejar=self.session.cookies, overwrite=True)
+
+        if self._bound_ua:
+            self.session.headers["User-Agent"] = self._bound_ua
+
+        self._sync_http_client()
+
     def should_refresh_cookies(self):
         """Determine if cookies should be refreshed"""
+        # Fast path: cf_clearance present and within its TTL
+        if (time.time() < self._cookies_valid_until and 'cf_clearance' in self.cookies
+                and self.failed_attempts < self.max_failed_attempts):
+            return False
+
         # No cookies or missing cf_clearance
         if not self.cookies or 'cf_clearance' not in self.cookies:
             logger.info("Cookies need refresh: No cookies or missing cf_clearance")
@@ -289,75 +819,39 @@ class CloudflareBypass:
         return False
 
     def get_fresh_cookies(self):
-        """Get fresh Cloudflare cookies using multiple methods"""
+        """Get fresh Cloudflare cookies, trying the last method that worked first"""
         logger.info("Generating fresh Cloudflare cookies...")
 
-        # Try cloudscraper first
-        if CLOUDSCRAPER_AVAILABLE:
-            success = self._get_cookies_with_cloudscraper()
-            if success or self.cookies:
-                self.failed_attempts = 0
-                return True
+        if self._last_successful_method is None:
+            self._last_successful_method = self._read_cookie_data().get('last_successful_method')
+
+        # Stable sort: the remembered method first, otherwise the default order
+        order = sorted(self._refresh_methods, key=lambda name: name != self._last_successful_method)
 
-        # Only use TLS Client if cookies are still empty
-        if TLS_CLIENT_AVAILABLE and not self.cookies:
-            success = self._get_cookies_with_tls_client()
-            if success:
+        for name in order:
+            if self._refresh_methods[name]():
                 self.failed_attempts = 0
+                self._sync_http_client()
                 return True
 
         # If we can't get cf_clearance, just continue with session
         logger.warning("Could not get cf_clearance cookie, continuing with regular session")
 
-        # Create a new session anyway
-        self.session = self._create_session()
+        # Keep the existing session (and its connection pool), just reset its cookies
+        self._sync_session_cookies()
         # We'll keep trying on each request
         return False
 
     def _get_cookies_with_cloudscraper(self):
         """Get cookies using CloudScraper with enhanced browser fingerprinting"""
-        if not CLOUDSCRAPER_AVAILABLE:
-            return False
-
         try:
             logger.info("Attempting to get cookies with CloudScraper...")
 
-            # More advanced browser fingerprinting
-            browser_details = {
-                'browser': 'chrome',
-                'platform': 'windows',
-                'desktop': True,
-                'mobile': False,
-                'renderer': 'webkit'
-            }
-
-            # Create a new cloudscraper instance
-            scraper = cloudscraper.create_scraper(
-                browser=browser_details,
-                delay=3,  # Add a delay between requests
-                interpreter='nodejs'  # Try using nodejs interpreter
-            )
+            # Reuse the shared cloudscraper instance; it solves challenges in-session
+            scraper = self._get_scraper()
 
             # Set more detailed headers to make it look more like a real browser
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Cache-Control': 'max-age=0',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'sec-ch-ua': '"Google Chrome";v="135", "Not-A.Brand";v="8", "Chromium";v="135"',
-                'sec-ch-ua-mobile': '?0',
-                'sec-ch-ua-platform': '"Windows"',
-                'Upgrade-Insecure-Requests': '1',
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'DNT': '1',
-                'Pragma': 'no-cache'
-            }
-            scraper.headers.update(headers)
+            scraper.headers.update(_CLOUDSCRAPER_HEADERS)
 
             # Try direct connection
             target_url = f"{self.base_url}/"
@@ -372,10 +866,9 @@ class CloudflareBypass:
             # Try to find cf_clearance specifically
             if 'cf_clearance' in cookies:
                 logger.info(f"Found cf_clearance: {cookies['cf_clearance'][:8]}...")
-                self._save_cookies(cookies)
+                self._save_cookies(cookies, scraper.headers.get('User-Agent'), 'cloudscraper')
 
-                # Replace the current session with this new one
-                self.session = scraper
+                # The shared scraper is the session, so it already carries these cookies
                 return True
             else:
                 # Try a different page to get cookies
@@ -387,16 +880,14 @@ class CloudflareBypass:
                 cookies = scraper.cookies.get_dict()
                 if 'cf_clearance' in cookies:
                     logger.info(f"Found cf_clearance on second try: {cookies['cf_clearance'][:8]}...")
-                    self._save_cookies(cookies)
-                    self.session = scraper
+                    self._save_cookies(cookies, scraper.headers.get('User-Agent'), 'cloudscraper')
                     return True
 
                 logger.warning("No cf_clearance cookie found in response")
 
                 # Save whatever cookies we got anyway
                 if cookies:
-                    self._save_cookies(cookies)
-                    self.session = scraper
+                    self._save_cookies(cookies, scraper.headers.get('User-Agent'), 'cloudscraper')
 
                 return False
 
@@ -406,32 +897,20 @@ class CloudflareBypass:
 
     def _get_cookies_with_tls_client(self):
         """Get cookies using TLS Client with fixed timeout handling"""
-        if not TLS_CLIENT_AVAILABLE:
-            return False
-
         try:
             logger.info("Attempting to get cookies with TLS Client...")
+            tls_client = _import_tls_client()
 
             # Create TLS client instance with more specific browser profile
             client = tls_client.Session(client_identifier="chrome112")
 
             # Set headers
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept-Encoding": "gzip, deflate, br",
-                "sec-ch-ua": '"Google Chrome";v="112", "Chromium";v="112", "Not-A.Brand";v="99"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-                "Upgrade-Insecure-Requests": "1"
-            }
+            headers = _TLS_CLIENT_HEADERS
             client.headers.update(headers)
 
             # Access the site (remove timeout parameter which was causing the error)
-            target_url = f"{self.base_url}{self.target_page}"
-            logger.info(f"Accessing {target_url} with TLS Client...")
-            response = client.get(target_url)  # No timeout parameter
+            logger.info(f"Accessing {self.target_url} with TLS Client...")
+            response = client.get(self.target_url)  # No timeout parameter
 
             if response.status_code == 200:
                 # Extract and save cookies
@@ -440,13 +919,11 @@ class CloudflareBypass:
                 # Check if cf_clearance is present
                 if 'cf_clearance' in cookies:
                     logger.info(f"Found cf_clearance: {cookies['cf_clearance'][:8]}...")
-                    self._save_cookies(cookies)
+                    self._save_cookies(cookies, headers['User-Agent'], 'tls_client')
 
-                    # Create a new session with these cookies
-                    self.session = requests.Session()
+                    # Move these cookies onto the existing session
                     self.session.headers.update(headers)
-                    for name, value in cookies.items():
-                        self.session.cookies.set(name, value)
+                    self._sync_session_cookies()
 
                     return True
                 else:
@@ -454,13 +931,11 @@ class CloudflareBypass:
 
                     # Save whatever cookies we got anyway
                     if cookies:
-                        self._save_cookies(cookies)
+                        self._save_cookies(cookies, headers['User-Agent'], 'tls_client')
 
-                        # Use regular session with these cookies
-                        self.session = requests.Session()
+                        # Move these cookies onto the existing session
                         self.session.headers.update(headers)
-                        for name, value in cookies.items():
-                            self.session.cookies.set(name, value)
+                        self._sync_session_cookies()
 
                     return False
             elif response.status_code == 403:
@@ -490,139 +965,138 @@ class CloudflareBypass:
 
     def get(self, url, **kwargs):
         """Make a GET request with Cloudflare bypass"""
-        # Extract special parameters
-        enable_logging = kwargs.pop('enable_logging', self.enable_logging)
-        log_filename = kwargs.pop('log_filename', None)
-
         # Refresh only once per session start or after 403
         if self.should_refresh_cookies() and not self.cookies:
             logger.info("No valid cookies at startup, refreshing...")
             self.get_fresh_cookies()
 
-        # Make the request with retry logic
-        max_retries = kwargs.pop('max_retries', 3)
-        backoff_factor = kwargs.pop('backoff_factor', 1.5)
-
-        for attempt in range(max_retries):
-            try:
-                logger.info(f"Making request to {url} (attempt {attempt + 1}/{max_retries})")
-
-                # Make the actual request
-                response = self.session.get(url, **kwargs)
-
-                # Check for JSON in HTML response
-                if ('application/json' in kwargs.get('headers', {}).get('Accept', '') and
-                        'text/html' in response.headers.get('Content-Type', '')):
-                    logger.info("Response has HTML content type but we requested JSON, checking for JSON...")
-                    json_match = re.search(r'({"userinfo":.*})', response.text)
-                    if json_match:
-                        logger.info("Found JSON object in HTML response")
-
-                # Log the request if enabled
-                if enable_logging:
-                    log_path = self.request_logger.log_from_response(
-                        url=url,
-                        method="GET",
-                        headers=dict(self.session.headers),
-                        params=kwargs.get('params'),
-                        response=response,
-                        log_filename=log_filename
-                    )
-
-                # Check for Cloudflare challenge
-                if response.status_code == 403 or "challenge" in response.text.lower():
-                    logger.warning(f"Got Cloudflare challenge on attempt {attempt + 1}, refreshing cookies...")
-                    self.get_fresh_cookies()
-                    continue
+        return self._request("GET", url, **kwargs)
 
-                # Handle success or failure
-                if response.status_code == 200:
-                    self.failed_attempts = 0
-                else:
-                    self.failed_attempts += 1
-
-                return response
-
-            except Exception as e:
-                logger.error(f"Request error on attempt {attempt + 1}: {str(e)}")
-                self.failed_attempts += 1
-
-                # Calculate backoff with jitter
-                wait_time = min(30, backoff_factor * (2 ** attempt) * (0.8 + 0.4 * random.random()))
-                time.sleep(wait_time)
+    def post(self, url, **kwargs):
+        """Make a POST request with Cloudflare bypass"""
+        # Check if cookies need refreshing
+        if self.should_refresh_cookies():
+            logger.info("Cookies expired or invalid, refreshing...")
+            self.get_fresh_cookies()
 
-                # Refresh session for next attempt
-                if attempt < max_retries - 1:
-                    self.refresh_session()
+        return self._request("POST", url, **kwargs)
 
-        # If we get here, all retries failed
-        raise Exception(f"Failed to get {url} after {max_retries} attempts")
+    def _request(self, method, url, **kwargs):
+        """Send a request, refreshing cookies and retrying once on a Cloudflare challenge.
 
-    def post(self, url, **kwargs):
-        """Make a POST request with Cloudflare bypass"""
+        Connection errors and 5xx responses are retried with backoff per
+        RETRY_POLICY: by the session's adapters for requests, and by
+        _send_httpx (5xx) and the transport (connection errors) for httpx.
+        """
         # Extract special parameters
         enable_logging = kwargs.pop('enable_logging', self.enable_logging)
         log_filename = kwargs.pop('log_filename', None)
 
-        # Check if cookies need refreshing
-        if self.should_refresh_cookies():
-            logger.info("Cookies expired or invalid, refreshing...")
-            self.get_fresh_cookies()
+        # No longer honoured per call; retries are handled by RETRY_POLICY
+        for name in ('max_retries', 'backoff_factor'):
+            if name in kwargs:
+                kwargs.pop(name)
+                logger.warning(f"{name} is deprecated and ignored; retries follow RETRY_POLICY")
+
+        if self._client is not None:
+            unsupported = _REQUESTS_ONLY_KWARGS.intersection(kwargs)
+            if unsupported:
+                raise TypeError(f"{', '.join(sorted(unsupported))} not supported with transport='httpx'")
+            # httpx spells requests' allow_redirects as follow_redirects
+            if 'allow_redirects' in kwargs:
+                kwargs['follow_redirects'] = kwargs.pop('allow_redirects')
+            # httpx sets proxies per client, so route through one built for the
+            # session's proxies (as set by callers) plus any given for this call
+            http = self._http_client_for({**self.session.proxies, **(kwargs.pop('proxies', None) or {})})
+        else:
+            http = self.session
 
-        # Make the request with retry logic
-        max_retries = kwargs.pop('max_retries', 3)
-        backoff_factor = kwargs.pop('backoff_factor', 1.5)
+        attempts = CHALLENGE_ATTEMPTS
+        for attempt in range(attempts):
+            logger.info(f"Making {method} request to {url} (attempt {attempt + 1}/{attempts})")
 
-        for attempt in range(max_retries):
             try:
-                logger.info(f"Making POST request to {url} (attempt {attempt + 1}/{max_retries})")
-
-                # Make the actual request
-                response = self.session.post(url, **kwargs)
-
-                # Log the request if enabled
-                if enable_logging:
-                    log_path = self.request_logger.log_from_response(
-                        url=url,
-                        method="POST",
-                        headers=dict(self.session.headers),
-                        params=kwargs.get('params'),
-                        response=response,
-                        log_filename=log_filename
-                    )
-
-                # Check for Cloudflare challenge
-                if response.status_code == 403 or "challenge" in response.text.lower():
+                if http is not self.session:
+                    response = self._send_httpx(http, method, url, **kwargs)
+                else:
+                    response = http.request(method, url, **kwargs)
+            except Exception as e:
+                logger.error(f"Request error on attempt {attempt + 1}: {str(e)}")
+                self.failed_attempts += 1
+                raise Exception(f"Failed to {method} {url}: {str(e)}") from e
+
+            # Decoded body, filled in at most once and only if something needs it
+            body = None
+
+            # Check for JSON in HTML response
+            if ('application/json' in kwargs.get('headers', {}).get('Accept', '') and
+                    'text/html' in response.headers.get('Content-Type', '')):
+                logger.info("Response has HTML content type but we requested JSON, checking for JSON...")
+                # Cheap bytes check first; only decode when the marker is there
+                if _USERINFO_MARKER_BYTES in response.content:
+                    body = response.text
+                if body is not None and _extract_userinfo_json(body):
+                    logger.info("Found JSON object in HTML response")
+
+            # Log the request if enabled
+            if enable_logging:
+                self.request_logger.log_from_response(
+                    url=url,
+                    method=method,
+                    headers=http.headers,
+                    params=kwargs.get('params'),
+                    response=response,
+                    log_filename=log_filename,
+                    body=body
+                )
+
+            # Check for Cloudflare challenge
+            if _is_cloudflare_challenge(response):
+                response.close()
+                if attempt < attempts - 1:
                     logger.warning(f"Got Cloudflare challenge on attempt {attempt + 1}, refreshing cookies...")
                     self.get_fresh_cookies()
                     continue
+                self.failed_attempts += 1
+                break
 
-                # Handle success or failure
-                if response.status_code == 200:
-                    self.failed_attempts = 0
-                else:
-                    self.failed_attempts += 1
+            # Handle success or failure
+            if response.status_code == 200:
+                self.failed_attempts = 0
+            else:
+                self.failed_attempts += 1
 
-                return response
+            return response
 
-            except Exception as e:
-                logger.error(f"Request error on attempt {attempt + 1}: {str(e)}")
-                self.failed_attempts += 1
+        # If we get here, the challenge persisted after refreshing cookies
+        raise Exception(f"Failed to {method} {url} after {attempts} attempts (Cloudflare challenge)")
+
+    def _send_httpx(self, client, method, url, **kwargs):
+        """Send a request over an httpx client, retrying 5xx responses per RETRY_POLICY.
 
-                # Calculate backoff with jitter
-                wait_time = min(30, backoff_factor * (2 ** attempt) * (0.8 + 0.4 * random.random()))
-                time.sleep(wait_time)
+        httpx's transport only retries failed connections, so status retries
+        are driven here by the same urllib3 Retry object the requests adapters
+        use: it decides what is retryable, counts attempts and sleeps.
+        """
+        retry = RETRY_POLICY
+        while True:
+            response = client.request(method, url, **kwargs)
+            if not retry.is_retry(method, response.status_code):
+                return response
 
-                # Refresh session for next attempt
-                if attempt < max_retries - 1:
-                    self.refresh_session()
+            try:
+                retry = retry.increment(method, url)
+            except MaxRetryError:
+                return response
 
-        # If we get here, all retries failed
-        raise Exception(f"Failed to post to {url} after {max_retries} attempts")
+            response.close()
+            logger.warning(f"Got {response.status_code} from {url}, retrying ({len(retry.history)}/{RETRY_POLICY.total})")
+            retry.sleep()
 
     def refresh_session(self):
-        """Refresh the session with new cookies"""
+        """Refresh the session with new cookies, keeping its connection pool"""
         self.get_fresh_cookies()
+        self._sync_session_cookies()
         logger.info("Refreshed session with new cookies")
 
     def set_logging(self, enable_logging=True, save_readable=False):
@@ -631,18 +1105,19 @@ class CloudflareBypass:
         self.request_logger.enabled = enable_logging
 
 
-def get_cloudflare_bypass(base_url, cookie_file=None, cookie_max_age=3600):
+def get_cloudflare_bypass(base_url, cookie_file=None, cookie_max_age=3600, transport='requests'):
     """Get a CloudflareBypass instance for a specific site"""
     if not cookie_file:
         # Generate a filename based on the domain
-        domain = re.sub(r'^https?://', '', base_url).split('/')[0]
+        domain = _strip_scheme(base_url).split('/')[0]
         cookie_file = f"data/{domain}_cookies.json"
 
-    return CloudflareBypass(
-        cookie_file=cookie_file,
+    return CloudflareBypass.shared(
         base_url=base_url,
+        cookie_file=cookie_file,
         target_page="/",
-        cookie_max_age=cookie_max_age
+        cookie_max_age=cookie_max_age,
+        transport=transport
     )
 
 
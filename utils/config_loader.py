@@ -4,30 +4,230 @@ Configuration Loader Utility
 Provides functions for loading module configurations from the config directory.
 """
 
+import copy
 import json
 import logging
+import mmap
 import os
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from types import MappingProxyType
+from typing import Callable, Dict, List, Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger("ConfigLoader")
 
+# Project root directory
+_ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Plain string paths for the per-call lookups, avoiding Path objects there
+_ROOT_PATH = str(_ROOT_DIR)
+_MODULES_DIR = os.path.join(_ROOT_PATH, "config", "modules")
+
+# Set once ensure_config_dirs has created the directories
+_DIRS_READY = False
+
+# Module config locations, in order of preference
+_CONFIG_PATH_TEMPLATES = (
+    os.path.join(_MODULES_DIR, "{name}.json"),
+    os.path.join(_ROOT_PATH, "config", "{name}.json"),
+    os.path.join(_ROOT_PATH, "config", "config_{name}.json"),
+    os.path.join(_ROOT_PATH, "config_{name}.json")
+)
+
+# Global config locations, in order of preference
+_GLOBAL_CONFIG_PATHS = (
+    os.path.join(_ROOT_PATH, "config", "global.json"),
+    os.path.join(_ROOT_PATH, "config", "config.json"),
+    os.path.join(_ROOT_PATH, "config.json")
+)
+
+# Config file found for each module (the global config uses the key None)
+_RESOLVED_PATHS: Dict[Optional[str], str] = {}
+
+# Global configuration used when no config file exists
+_DEFAULT_GLOBAL_CONFIG = MappingProxyType({
+    "discord_webhook": "",
+    "check_interval": 60,
+    "use_proxies": True,
+    "gui_enabled": False,
+    "modules": {
+        "booksamillion": {
+            "enabled": True,
+            "interval": 300
+        }
+    }
+})
+
+# Legacy target file holding each target key
+_TARGET_KEY_FILES = {
+    "pids": "pid_list.json",
+    "priority_pids": "pid_list.json",
+    "urls": "urls.json",
+    "search_urls": "urls.json",
+    "item_urls": "urls.json",
+    "keywords": "keywords.json",
+    "categories": "keywords.json",
+    "brands": "keywords.json"
+}
+
+# Legacy target file for each target type accepted by save_module_targets
+_TARGET_FILES = {
+    "urls": "urls.json",
+    "pids": "pid_list.json",
+    "keywords": "keywords.json"
+}
+
+# File names in a directory keyed by path, stored as (st_mtime_ns, names)
+_DIR_LISTINGS: Dict[str, tuple] = {}
+
+# Files larger than this are memory-mapped for parsing (with orjson)
+_MMAP_THRESHOLD = 64 * 1024
+
+# Parsed JSON files keyed by path, stored as (st_mtime_ns, data)
+_CONFIG_CACHE: Dict[str, tuple] = {}
+
+
+def _json_loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(data: Any) -> bytes:
+    """Serialize data to indented JSON bytes, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def _read_json(path: Union[str, Path]) -> Any:
+    """
+    Parse a JSON file, reusing the previous result while its mtime is unchanged
+
+    The returned object is the cached one; public loaders copy it before
+    handing it out.
+    """
+    key = os.fspath(path)
+    st = os.stat(key)
+    mtime = st.st_mtime_ns
+    entry = _CONFIG_CACHE.get(key)
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+
+    with open(key, "rb") as f:
+        if orjson is not None and st.st_size > _MMAP_THRESHOLD:
+            # Let orjson parse the mapped pages instead of a copy of the file
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                data = orjson.loads(view)
+        else:
+            data = _json_loads(f.read())
+    _CONFIG_CACHE[key] = (mtime, data)
+    return data
+
+
+def _dir_listing(directory: Union[str, Path]) -> frozenset:
+    """
+    Return the names of the entries in a directory, re-listing it only when
+    the directory's mtime changes (i.e. files were added, removed or renamed)
+    """
+    key = os.fspath(directory)
+    try:
+        mtime = os.stat(key).st_mtime_ns
+    except FileNotFoundError:
+        _DIR_LISTINGS.pop(key, None)
+        return frozenset()
+
+    entry = _DIR_LISTINGS.get(key)
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+
+    with os.scandir(key) as it:
+        names = frozenset(entry.name for entry in it)
+    _DIR_LISTINGS[key] = (mtime, names)
+    return names
+
+
+def _find_config_path(key: Optional[str], candidates) -> Optional[str]:
+    """
+    Return the first existing path from candidates, remembering it under key
+
+    Only hits are remembered, so a config file created later is still found.
+    """
+    path = _RESOLVED_PATHS.get(key)
+    if path is not None:
+        return path
+
+    for path in candidates:
+        if os.path.basename(path) in _dir_listing(os.path.dirname(path)):
+            _RESOLVED_PATHS[key] = path
+            return path
+    return None
+
+
+def _write_json(path: Path, data: Any):
+    """
+    Atomically replace a JSON file (unless it already holds the same bytes)
+    and keep a copy of data as its cached contents
+    """
+    payload = _json_dumps(data)
+
+    # Leave the file (and its mtime) alone when the contents wouldn't change
+    try:
+        unchanged = path.read_bytes() == payload
+    except FileNotFoundError:
+        unchanged = False
+
+    if not unchanged:
+        # Write to a temp file and rename so readers never see a partial file
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, path)
+    _CONFIG_CACHE[str(path)] = (path.stat().st_mtime_ns, copy.deepcopy(data))
+
+
+def invalidate_config_cache(module_name: Optional[str] = None):
+    """
+    Drop cached config files so the next load reads them from disk
+
+    Args:
+        module_name: Only drop this module's files (all files if None)
+    """
+    if module_name is None:
+        _CONFIG_CACHE.clear()
+        _RESOLVED_PATHS.clear()
+        return
+
+    _RESOLVED_PATHS.pop(module_name, None)
+
+    for key in list(_CONFIG_CACHE):
+        path = Path(key)
+        if path.stem in (module_name, f"config_{module_name}") or path.parent.name == module_name:
+            _CONFIG_CACHE.pop(key, None)
+
 
 def ensure_config_dirs():
-    """Create configuration directories if they don't exist"""
-    # Get the project root directory
-    root_dir = Path(__file__).resolve().parent.parent
+    """Create configuration directories if they don't exist (once per process)"""
+    global _DIRS_READY
+    if _DIRS_READY:
+        return
 
     # Create required directories
     dirs = [
-        root_dir / "config",
-        root_dir / "config/modules",
-        root_dir / "data"
+        _ROOT_DIR / "config",
+        _ROOT_DIR / "config/modules",
+        _ROOT_DIR / "data"
     ]
 
     for directory in dirs:
         directory.mkdir(exist_ok=True)
 
+    _DIRS_READY = True
     logger.debug("Configuration directories verified")
 
 
@@ -35,54 +235,54 @@ def load_module_config(module_name: str) -> Dict[str, Any]:
     """
     Load consolidated module configuration with secure webhook handling
 
+    Files are only re-parsed when they change on disk; each call returns its
+    own copy, so callers may modify it.
+
     Args:
         module_name: Name of the module
 
     Returns:
         Dict with module configuration
     """
-    import os  # Add this import
     ensure_config_dirs()
 
-    # Get the project root directory
-    root_dir = Path(__file__).resolve().parent.parent
-
-    # Define possible config paths with preference order
-    config_paths = [
-        root_dir / f"config/modules/{module_name}.json",
-        root_dir / f"config/{module_name}.json",
-        root_dir / f"config/config_{module_name}.json",
-        root_dir / f"config_{module_name}.json"
-    ]
-
-    # Try each path until we find a config file
-    for config_path in config_paths:
-        if config_path.exists():
-            try:
-                with open(config_path, "r") as f:
-                    config = json.load(f)
-                    logger.info(f"Loaded module config from {config_path}")
-
-                    # Handle webhook security - add this block
-                    if module_name == 'booksamillion' and 'webhook' in config:
-                        module_webhook_var = f"{module_name.upper()}_WEBHOOK"
-                        # Try module-specific webhook first, then fallback to global
-                        if os.getenv(module_webhook_var):
-                            config['webhook']['url'] = os.getenv(module_webhook_var)
-                        elif os.getenv('DISCORD_WEBHOOK'):
-                            config['webhook']['url'] = os.getenv('DISCORD_WEBHOOK')
-
-                    return config
-            except Exception as e:
-                logger.error(f"Error loading config from {config_path}: {str(e)}")
+    # Use the first config file found in order of preference
+    config_path = _find_config_path(
+        module_name,
+        (template.format(name=module_name) for template in _CONFIG_PATH_TEMPLATES)
+    )
+    if config_path is not None:
+        try:
+            config = _read_json(config_path)
+            logger.info("Loaded module config from %s", config_path)
+
+            # Handle webhook security - add this block
+            if module_name == 'booksamillion' and 'webhook' in config:
+                module_webhook_var = f"{module_name.upper()}_WEBHOOK"
+                # Try module-specific webhook first, then fallback to global
+                webhook_url = os.getenv(module_webhook_var) or os.getenv('DISCORD_WEBHOOK')
+                if webhook_url:
+                    # Copy rather than modify the cached config
+                    config = {**config, 'webhook': {**config['webhook'], 'url': webhook_url}}
+
+            return copy.deepcopy(config)
+        except FileNotFoundError:
+            # Removed since it was found, search again next time
+            _RESOLVED_PATHS.pop(module_name, None)
+        except Exception as e:
+            logger.error("Error loading config from %s: %s", config_path, e)
 
     # If no config found, check for legacy target files
     targets = load_legacy_targets(module_name)
     if targets:
-        logger.info(f"Loaded legacy target files for {module_name}")
+        logger.info("Loaded legacy target files for %s", module_name)
+        # Merge them into config/modules/<module>.json so later loads read one file.
+        # Only when no config file exists, never over one that failed to parse.
+        if config_path is None:
+            save_module_config(module_name, targets)
         return targets
 
-    logger.warning(f"No configuration found for {module_name}")
+    logger.warning("No configuration found for %s", module_name)
     return {}
 
 def load_legacy_targets(module_name: str) -> Dict[str, Any]:
@@ -95,54 +295,129 @@ def load_legacy_targets(module_name: str) -> Dict[str, Any]:
     Returns:
         Dict with target configurations
     """
-    # Get the project root directory
-    root_dir = Path(__file__).resolve().parent.parent
-
     # Define the legacy targets path
-    targets_path = root_dir / "config/targets" / module_name
+    targets_path = _ROOT_DIR / "config/targets" / module_name
 
-    if not targets_path.exists():
+    # One directory listing instead of probing each file
+    target_files = _dir_listing(targets_path)
+    if not target_files:
         return {}
 
     targets = {}
 
     # Load keywords if available
     keywords_file = targets_path / "keywords.json"
-    if keywords_file.exists():
+    if keywords_file.name in target_files:
         try:
-            with open(keywords_file, "r") as f:
-                keyword_data = json.load(f)
-                targets.update(keyword_data)
+            targets.update(_read_json(keywords_file))
         except Exception as e:
-            logger.error(f"Error loading keywords for {module_name}: {str(e)}")
+            logger.error("Error loading keywords for %s: %s", module_name, e)
 
     # Load PIDs if available
     pid_file = targets_path / "pid_list.json"
-    if pid_file.exists():
+    if pid_file.name in target_files:
         try:
-            with open(pid_file, "r") as f:
-                pid_data = json.load(f)
-                targets.update(pid_data)
+            targets.update(_read_json(pid_file))
         except Exception as e:
-            logger.error(f"Error loading PIDs for {module_name}: {str(e)}")
+            logger.error("Error loading PIDs for %s: %s", module_name, e)
 
     # Load URLs if available
     url_file = targets_path / "urls.json"
-    if url_file.exists():
+    if url_file.name in target_files:
         try:
-            with open(url_file, "r") as f:
-                url_data = json.load(f)
-                targets.update(url_data)
+            targets.update(_read_json(url_file))
         except Exception as e:
-            logger.error(f"Error loading URLs for {module_name}: {str(e)}")
+            logger.error("Error loading URLs for %s: %s", module_name, e)
 
     return targets
 
 
+class LazyTargets(Mapping):
+    """
+    Read-only view of a module's target files
+
+    Each file is only read the first time one of its keys is accessed. Keys
+    missing from their file, or whose file doesn't exist, read as [].
+    """
+
+    def __init__(self, base_path: Path):
+        self.base_path = base_path
+        self._loaded: Dict[str, Dict[str, Any]] = {}
+
+    def _load(self, filename: str) -> Dict[str, Any]:
+        data = self._loaded.get(filename)
+        if data is None:
+            try:
+                data = _read_json(self.base_path / filename)
+            except FileNotFoundError:
+                data = {}
+            except Exception as e:
+                logger.error("Error loading %s from %s: %s", filename, self.base_path, e)
+                data = {}
+            self._loaded[filename] = data
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        # The loaded file is shared through the JSON cache, so hand out a copy
+        return list(self._load(_TARGET_KEY_FILES[key]).get(key, []))
+
+    def __iter__(self):
+        return iter(_TARGET_KEY_FILES)
+
+    def __len__(self) -> int:
+        return len(_TARGET_KEY_FILES)
+
+
+def load_module_targets(module_name: str) -> LazyTargets:
+    """
+    Load a module's target lists (urls, pids, keywords, ...) on demand
+
+    Args:
+        module_name: Name of the module
+
+    Returns:
+        LazyTargets reading config/targets/<module_name> as keys are accessed
+    """
+    return LazyTargets(_ROOT_DIR / "config/targets" / module_name)
+
+
+def save_module_targets(module_name: str, target_type: str, data: Dict[str, Any]) -> bool:
+    """
+    Save one of a module's target files
+
+    Args:
+        module_name: Name of the module
+        target_type: "urls", "pids" or "keywords"
+        data: Contents of the target file
+
+    Returns:
+        bool: True if successful
+    """
+    filename = _TARGET_FILES.get(target_type)
+    if filename is None:
+        logger.error("Unknown target type for %s: %s", module_name, target_type)
+        return False
+
+    base_path = _ROOT_DIR / "config/targets" / module_name
+    file_path = base_path / filename
+
+    try:
+        base_path.mkdir(parents=True, exist_ok=True)
+        _write_json(file_path, data)
+        logger.info("Saved %s targets to %s", target_type, file_path)
+        return True
+    except Exception as e:
+        logger.error("Error saving %s targets to %s: %s", target_type, file_path, e)
+        return False
+
+
 def save_module_config(module_name: str, config: Dict[str, Any]) -> bool:
     """
     Save consolidated module configuration
 
+    The file is replaced atomically and a copy of config becomes the cached
+    result of load_module_config.
+
     Args:
         module_name: Name of the module
         config: Configuration to save
@@ -152,22 +427,39 @@ def save_module_config(module_name: str, config: Dict[str, Any]) -> bool:
     """
     ensure_config_dirs()
 
-    # Get the project root directory
-    root_dir = Path(__file__).resolve().parent.parent
-
     # Define config path
-    config_path = root_dir / f"config/modules/{module_name}.json"
+    config_path = _ROOT_DIR / f"config/modules/{module_name}.json"
 
     try:
-        with open(config_path, "w") as f:
-            json.dump(config, f, indent=2)
-        logger.info(f"Saved module config to {config_path}")
+        # Drop stale entries (e.g. a lower priority file), then cache what was written
+        invalidate_config_cache(module_name)
+        _write_json(config_path, config)
+        logger.info("Saved module config to %s", config_path)
         return True
     except Exception as e:
-        logger.error(f"Error saving config to {config_path}: {str(e)}")
+        logger.error("Error saving config to %s: %s", config_path, e)
         return False
 
 
+def _update_module_config(module_name: str,
+                          mutator: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> bool:
+    """
+    Apply a change to a module's configuration with one read and one write
+
+    Args:
+        module_name: Name of the module
+        mutator: Returns the updated configuration, or None if nothing
+            changed and the file should not be rewritten
+
+    Returns:
+        bool: True if successful
+    """
+    config = mutator(load_module_config(module_name))
+    if config is None:
+        return True
+    return save_module_config(module_name, config)
+
+
 def update_pid_list(module_name: str, new_pids: List[str]) -> bool:
     """
     Update PID list in configuration
@@ -179,66 +471,57 @@ def update_pid_list(module_name: str, new_pids: List[str]) -> bool:
     Returns:
         bool: True if successful
     """
-    # Load current configuration
-    config = load_module_config(module_name)
-
-    # Add new PIDs
-    current_pids = set(config.get("pids", []))
-    current_pids.update(new_pids)
+    def add_pids(config):
+        current_pids = set(config.get("pids", []))
+        incoming = set(new_pids)
+        # Nothing to write when every PID is already listed
+        if incoming <= current_pids:
+            return None
+        return {**config, "pids": list(current_pids | incoming)}
 
-    # Update configuration
-    config["pids"] = list(current_pids)
-
-    # Save configuration
-    return save_module_config(module_name, config)
+    return _update_module_config(module_name, add_pids)
 
 
 def load_global_config() -> Dict[str, Any]:
     """
     Load global configuration
 
+    The file is only re-parsed when it changes on disk; each call returns
+    its own copy, so callers may modify it.
+
     Returns:
         Dict with global configuration
     """
     ensure_config_dirs()
 
-    # Get the project root directory
-    root_dir = Path(__file__).resolve().parent.parent
+    # Use the first config file found in order of preference
+    config_path = _find_config_path(None, _GLOBAL_CONFIG_PATHS)
+    if config_path is not None:
+        try:
+            config = _read_json(config_path)
+            logger.debug("Loaded global config from %s", config_path)
+            return copy.deepcopy(config)
+        except FileNotFoundError:
+            # Removed since it was found, search again next time
+            _RESOLVED_PATHS.pop(None, None)
+        except Exception as e:
+            logger.error("Error loading global config from %s: %s", config_path, e)
 
-    # Define possible config paths with preference order
-    config_paths = [
-        root_dir / "config/global.json",
-        root_dir / "config/config.json",
-        root_dir / "config.json"
-    ]
+    logger.warning("No global configuration found, using defaults")
+    # Deep copy so the nested defaults can't be changed through the result
+    return copy.deepcopy(dict(_DEFAULT_GLOBAL_CONFIG))
 
-    # Try each path until we find a config file
-    for config_path in config_paths:
-        if config_path.exists():
-            try:
-                with open(config_path, "r") as f:
-                    config = json.load(f)
-                    logger.debug(f"Loaded global config from {config_path}")
-                    return config
-            except Exception as e:
-                logger.error(f"Error loading global config from {config_path}: {str(e)}")
-
-    # Return default configuration if no file found
-    default_config = {
-        "discord_webhook": "",
-        "check_interval": 60,
-        "use_proxies": True,
-        "gui_enabled": False,
-        "modules": {
-            "booksamillion": {
-                "enabled": True,
-                "interval": 300
-            }
-        }
-    }
 
-    logger.warning("No global configuration found, using defaults")
-    return default_config
+def preload_all_configs():
+    """
+    Load the global config and every module config into the caches
+
+    Call once at startup so later loads don't have to go to disk first.
+    """
+    load_global_config()
+    for filename in _dir_listing(_MODULES_DIR):
+        if filename.endswith(".json"):
+            load_module_config(filename[:-len(".json")])
 
 
 if __name__ == "__main__":
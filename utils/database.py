@@ -5,14 +5,29 @@ Provides database connection and operations for the stock checker.
 Can use either PostgreSQL (preferred) or SQLite (fallback).
 """
 
+import asyncio
+import atexit
+import copy
+import functools
+import heapq
 import json
 import logging
 import os
+import queue
 import sqlite3
+import threading
 import time
-from datetime import datetime
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger("Database")
 
@@ -20,15 +35,208 @@ logger = logging.getLogger("Database")
 try:
     import psycopg2
     import psycopg2.extras
+    import psycopg2.pool
 
     POSTGRES_AVAILABLE = True
 except ImportError:
     POSTGRES_AVAILABLE = False
     logger.warning("psycopg2 not available, falling back to SQLite")
 
+def _json_loads(data: Any) -> Any:
+    """Parse a JSON column value, using orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(data: Any) -> str:
+    """Serialize a value for a JSON column, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(data)
+
+
+# Connections kept in the pool
+POSTGRES_POOL_MIN = 1
+POSTGRES_POOL_MAX = 16
+SQLITE_POOL_SIZE = 4
+
+# Seconds to wait for a free SQLite connection before giving up
+SQLITE_POOL_TIMEOUT = 30.0
+
+# Frequently run statements; {ph} is filled in with the backend's placeholder and
+# {delay} with its expression for "now plus a bound number of seconds"
+STATEMENTS = {
+    "add_task": """
+        INSERT INTO tasks (task_type, module, data, priority, scheduled_at)
+        VALUES ({ph}, {ph}, {ph}, {ph}, {delay}){returning_id}
+    """,
+    "get_product": "SELECT * FROM products WHERE pid = {ph}",
+    "add_alert": "INSERT INTO alert_history (pid, alert_type, message) VALUES ({ph}, {ph}, {ph})",
+    "start_task": """
+        UPDATE tasks
+        SET status = 'running', started_at = CURRENT_TIMESTAMP, attempts = attempts + 1
+        WHERE id = {ph}
+    """,
+    "complete_task": """
+        UPDATE tasks
+        SET status = 'completed', completed_at = {ph}, result = {ph}
+        WHERE id = {ph}
+    """,
+    # Retry (when allowed and attempts remain) or fail permanently in one statement
+    "fail_task": """
+        UPDATE tasks
+        SET status = CASE WHEN {ph} AND attempts < max_attempts THEN 'pending' ELSE 'failed' END,
+            error = {ph},
+            scheduled_at = CASE WHEN {ph} AND attempts < max_attempts THEN {backoff} ELSE scheduled_at END,
+            completed_at = CASE WHEN {ph} AND attempts < max_attempts THEN completed_at ELSE CURRENT_TIMESTAMP END
+        WHERE id = {ph}
+    """,
+    "get_task_status": "SELECT status, attempts FROM tasks WHERE id = {ph}",
+    "log_event": "INSERT INTO logs (level, module, message, data, timestamp) VALUES ({ph}, {ph}, {ph}, {ph}, {ph})",
+    "get_module_config": "SELECT * FROM module_config WHERE module = {ph}",
+    "get_module_interval": "SELECT interval_seconds FROM module_config WHERE module = {ph}",
+    "update_module_config": """
+        INSERT INTO module_config (module, config, enabled)
+        VALUES ({ph}, {ph}, {ph})
+        ON CONFLICT (module) DO UPDATE
+        SET config = excluded.config,
+            interval_seconds = COALESCE({ph}, module_config.interval_seconds)
+    """,
+    "update_module_run": """
+        UPDATE module_config
+        SET last_run = CURRENT_TIMESTAMP, next_run = {delay}
+        WHERE module = {ph}
+    """,
+    "get_module_schedule": "SELECT module, {next_run_epoch} FROM module_config WHERE enabled = {ph}",
+    "save_cookies": """
+        INSERT INTO cookies (module, domain, cookies, timestamp, expires_at)
+        VALUES ({ph}, {ph}, {ph}, CURRENT_TIMESTAMP, {expires_at})
+        ON CONFLICT (module, domain) DO UPDATE
+        SET cookies = excluded.cookies, timestamp = CURRENT_TIMESTAMP, expires_at = excluded.expires_at
+    """,
+    "load_cookies": """
+        SELECT cookies
+        FROM cookies
+        WHERE module = {ph}
+          AND domain = {ph}
+          AND expires_at > CURRENT_TIMESTAMP
+    """
+}
+
+# Inserts stores given as {values}, returning the IDs of new and existing rows
+INSERT_STORES_SQL = """
+    INSERT INTO stores (
+        store_id, name, address, city, state, zip,
+        phone, latitude, longitude, module
+    ) VALUES {values}
+    ON CONFLICT (store_id, module) DO UPDATE SET name = stores.name
+    RETURNING store_id, module, id
+"""
+
+# Columns returned for claimed tasks
+TASK_COLUMNS = "id, task_type, module, data, priority, created_at, scheduled_at, attempts, max_attempts"
+
+# Seconds before retrying a failed task: 1min, 2min, 4min, 8min, ... by attempt
+RETRY_BACKOFF_SQL = "(CASE WHEN attempts > 0 THEN 60 * (1 << (attempts - 1)) ELSE 30 END)"
+
+# Stores looked up per query (two parameters each)
+STORE_LOOKUP_BATCH = 499
+
+# Stores inserted per query (ten parameters each)
+STORE_INSERT_BATCH = 99
+
+# INSERT ... RETURNING needs SQLite 3.35+
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Products whose last known stock status is kept in memory (SQLite only).
+# Filled as products are written; entries are checked against the row on
+# every update, so other writers to the same database can't make it stale.
+STOCK_CACHE_SIZE = 10_000
+
+# Rows fetched per round when streaming query results
+FETCH_BATCH_SIZE = 256
+
+# Seconds a module's config row is served from memory before re-reading it
+MODULE_CONFIG_TTL = 5.0
+
+# Seconds between reloads of the module run schedule, to pick up changes
+# made by other processes
+SCHEDULE_REFRESH_INTERVAL = 60.0
 
-class Database:
-    """Database connection and operations manager"""
+# Seconds between background flushes of queued log entries
+WRITE_FLUSH_INTERVAL = 0.5
+
+# Product writes between background ANALYZE runs
+ANALYZE_AFTER_WRITES = 10_000
+
+# Seconds between incremental vacuums (SQLite) / VACUUMs (Postgres)
+VACUUM_INTERVAL = 24 * 3600
+
+# Compiled statements kept per SQLite connection (sqlite3 defaults to 128)
+SQLITE_CACHED_STATEMENTS = 256
+
+# Applied to every SQLite connection
+SQLITE_PRAGMAS = (
+    "synchronous = NORMAL",
+    "temp_store = MEMORY",
+    "mmap_size = 268435456",  # 256 MB
+    "cache_size = -65536",  # 64 MB
+    "busy_timeout = 5000"
+)
+
+
+class _SQLitePool(queue.Queue):
+    """Queue of SQLite connections with the psycopg2 pool interface"""
+
+    def getconn(self) -> sqlite3.Connection:
+        try:
+            return self.get(timeout=SQLITE_POOL_TIMEOUT)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"No SQLite connection became free within {SQLITE_POOL_TIMEOUT} seconds; "
+                f"all {self.maxsize} connections are in use"
+            ) from None
+
+    def putconn(self, connection: sqlite3.Connection):
+        self.put(connection)
+
+    def closeall(self):
+        while True:
+            try:
+                self.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class Database(ABC):
+    """
+    Database connection and operations manager
+
+    Instantiating Database returns a PostgresDatabase when psycopg2 is
+    available and a SQLiteDatabase otherwise. The subclasses supply the
+    backend-specific SQL fragments and helpers, so no method branches on
+    db_type.
+    """
+
+    # Set by the backend subclasses
+    db_type: str = None
+    ph: str = None
+    delay_sql: str = None
+    epoch_sql: str = None
+    # Timestamp from epoch seconds bound to {ph}
+    from_epoch_sql: str = None
+    # Appended to an INSERT to get the new row's id back, if _inserted_id needs it
+    returning_id_sql: str = None
+    # Appended to the task claim subquery
+    claim_lock_sql: str = None
+    # Whether UPDATE ... RETURNING is supported
+    has_returning: bool = None
+
+    def __new__(cls, config: Dict[str, Any] = None):
+        if cls is Database:
+            cls = PostgresDatabase if POSTGRES_AVAILABLE else SQLiteDatabase
+        return super().__new__(cls)
 
     def __init__(self, config: Dict[str, Any] = None):
         """
@@ -38,8 +246,42 @@ class Database:
             config: Database configuration. If None, uses environment variables or defaults
         """
         self.config = config or {}
-        self.connection = None
-        self.db_type = "postgres" if POSTGRES_AVAILABLE else "sqlite"
+        self._pool = None
+        self._connect_lock = threading.Lock()
+        # One reusable cursor per pooled connection, keyed by id(connection)
+        self._cursors: Dict[int, Any] = {}
+        # Write counter and state for background maintenance
+        self._maintenance_lock = threading.Lock()
+        self._maintenance_running = False
+        self._writes_since_analyze = 0
+        self._last_vacuum = None
+        # Module config rows by module, stored as (monotonic read time, row)
+        self._module_config_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # Next run time (epoch seconds) of each enabled module, a heap of
+        # (next run, module) entries over it, and the modules found due
+        self._schedule_lock = threading.Lock()
+        self._schedule: Dict[str, float] = {}
+        self._schedule_heap: List[Tuple[float, str]] = []
+        self._due_modules: set = set()
+        self._schedule_loaded_at = None
+        # Log entries waiting for the background flush
+        self._pending_lock = threading.Lock()
+        self._pending_logs: List[Tuple] = []
+        self._flush_thread = None
+        self._flush_stop = threading.Event()
+
+        # Frequently run statements in this backend's placeholder style, built once
+        delay = self.delay_sql.format(ph=self.ph)
+        backoff = self.delay_sql.format(ph=RETRY_BACKOFF_SQL)
+        next_run_epoch = self.epoch_sql.format(column="next_run")
+        expires_at = self.from_epoch_sql.format(ph=self.ph)
+        self._sql = {
+            name: sql.format(ph=self.ph, delay=delay, backoff=backoff, next_run_epoch=next_run_epoch,
+                             expires_at=expires_at, returning_id=self.returning_id_sql)
+            for name, sql in STATEMENTS.items()
+        }
+        if self.has_returning:
+            self._sql["fail_task"] += "RETURNING status, attempts"
 
         # Get database config from environment if not provided
         if not self.config:
@@ -48,370 +290,263 @@ class Database:
         # Connect to database
         self.connect()
 
+    @abstractmethod
     def _load_config_from_env(self):
         """Load database configuration from environment variables"""
-        if POSTGRES_AVAILABLE:
-            self.config = {
-                "host": os.environ.get("DB_HOST", "localhost"),
-                "port": os.environ.get("DB_PORT", 5432),
-                "database": os.environ.get("DB_NAME", "stockchecker"),
-                "user": os.environ.get("DB_USER", "postgres"),
-                "password": os.environ.get("DB_PASSWORD", ""),
-            }
-        else:
-            self.config = {
-                "database": os.environ.get("DB_FILE", "stockchecker.db"),
-            }
 
     def connect(self):
-        """Connect to the database"""
-        if self.connection:
+        """Open the connection pool"""
+        with self._connect_lock:
+            if self._pool is None:
+                try:
+                    self._connect()
+                except Exception as e:
+                    logger.error(f"Error connecting to database: {str(e)}")
+                    raise
+
+    @abstractmethod
+    def _connect(self):
+        """Create the connection pool and prepare the database"""
+
+    def disconnect(self):
+        """Close the pooled database connections"""
+        if self._pool is None:
             return
 
-        try:
-            if self.db_type == "postgres":
-                self.connection = psycopg2.connect(
-                    host=self.config.get("host"),
-                    port=self.config.get("port"),
-                    database=self.config.get("database"),
-                    user=self.config.get("user"),
-                    password=self.config.get("password")
-                )
-                # Configure connection to handle JSON
-                psycopg2.extras.register_default_jsonb(self.connection)
-                logger.info(f"Connected to PostgreSQL database: {self.config.get('database')}")
-            else:
-                db_path = Path(self.config.get("database", "stockchecker.db"))
-                self.connection = sqlite3.connect(db_path)
-                # Enable foreign keys
-                self.connection.execute("PRAGMA foreign_keys = ON")
-                # Configure connection to handle JSON
-                self.connection.row_factory = sqlite3.Row
-                logger.info(f"Connected to SQLite database: {db_path}")
-
-                # Initialize SQLite database if needed
-                self._init_sqlite_schema()
+        # Stop the flusher and write out anything still queued
+        if self._flush_thread is not None:
+            self._flush_stop.set()
+            self._flush_thread.join()
+            self._flush_thread = None
+            self._flush_stop.clear()
+            atexit.unregister(self.flush)
+        self.flush()
+
+        self._pool.closeall()
+        self._pool = None
+        self._cursors.clear()
+        self._module_config_cache.clear()
+        self._schedule_loaded_at = None
+        logger.info("Disconnected from database")
+
+    @contextmanager
+    def acquire(self):
+        """
+        Borrow a connection and cursor from the pool
 
-        except Exception as e:
-            logger.error(f"Error connecting to database: {str(e)}")
-            raise
+        Commits when the block completes, rolls back if it raises, and returns
+        the connection to the pool either way. The cursor is reused by later
+        borrowers of the same connection, so fetch each result fully before
+        the next execute and don't close it.
 
-    def disconnect(self):
-        """Close the database connection"""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
-            logger.info("Disconnected from database")
+        Yields:
+            Tuple of (connection, cursor)
+        """
+        if self._pool is None:
+            self.connect()
 
-    def _init_sqlite_schema(self):
-        """Initialize SQLite database schema if needed"""
-        # Define SQLite-compatible schema
-        schema_sql = """
-        -- Products table
-        CREATE TABLE IF NOT EXISTS products (
-            pid TEXT PRIMARY KEY,
-            title TEXT NOT NULL,
-            price REAL,
-            url TEXT,
-            image_url TEXT,
-            first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_check TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            in_stock INTEGER DEFAULT 0,
-            last_in_stock TIMESTAMP,
-            last_out_of_stock TIMESTAMP,
-            data TEXT,
-            module TEXT NOT NULL
-        );
+        pool = self._pool
+        connection = pool.getconn()
 
-        -- Create index for faster searches
-        CREATE INDEX IF NOT EXISTS idx_products_in_stock ON products(in_stock);
-        CREATE INDEX IF NOT EXISTS idx_products_module ON products(module);
+        try:
+            cursor = self._get_cursor(connection)
 
-        -- Stores table
-        CREATE TABLE IF NOT EXISTS stores (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            store_id TEXT NOT NULL,
-            name TEXT NOT NULL,
-            address TEXT,
-            city TEXT,
-            state TEXT,
-            zip TEXT,
-            phone TEXT,
-            latitude REAL,
-            longitude REAL,
-            module TEXT NOT NULL,
-            UNIQUE(store_id, module)
-        );
+            try:
+                yield connection, cursor
+                connection.commit()
+            except BaseException:
+                # Includes GeneratorExit from a streaming caller that stopped early
+                connection.rollback()
+                raise
+        finally:
+            pool.putconn(connection)
+
+    def _get_cursor(self, connection):
+        """Get the cached cursor for a pooled connection, creating it if needed"""
+        cursor = self._cursors.get(id(connection))
+        # Guard against a stale entry left by a connection the pool replaced
+        if cursor is None or cursor.connection is not connection:
+            cursor = self._new_cursor(connection)
+            self._cursors[id(connection)] = cursor
+        return cursor
+
+    @abstractmethod
+    def _new_cursor(self, connection):
+        """Open a cursor that returns rows usable as mappings"""
+
+    def maintenance(self):
+        """
+        Refresh planner statistics and reclaim free space
 
-        -- Product availability in stores
-        CREATE TABLE IF NOT EXISTS product_availability (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pid TEXT REFERENCES products(pid),
-            store_id INTEGER REFERENCES stores(id),
-            available INTEGER DEFAULT 0,
-            check_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            quantity INTEGER,
-            price REAL,
-            UNIQUE(pid, store_id)
-        );
+        Runs ANALYZE (PRAGMA optimize on SQLite, VACUUM (ANALYZE) on Postgres)
+        and, at most once per VACUUM_INTERVAL, an incremental vacuum. Called in
+        the background after every ANALYZE_AFTER_WRITES product writes; can
+        also be called directly, e.g. from a scheduled job.
+        """
+        now = time.monotonic()
+        vacuum_due = self._last_vacuum is None or now - self._last_vacuum >= VACUUM_INTERVAL
 
-        -- Create index for faster lookups
-        CREATE INDEX IF NOT EXISTS idx_product_availability_pid ON product_availability(pid);
-        CREATE INDEX IF NOT EXISTS idx_product_availability_store ON product_availability(store_id);
+        try:
+            self._run_maintenance(vacuum_due)
 
-        -- Alert history
-        CREATE TABLE IF NOT EXISTS alert_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pid TEXT REFERENCES products(pid),
-            alert_type TEXT NOT NULL,
-            alert_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            message TEXT,
-            webhook_sent INTEGER DEFAULT 0,
-            data TEXT
-        );
+            if vacuum_due:
+                self._last_vacuum = now
+            logger.debug("Database maintenance completed")
 
-        -- Module configuration
-        CREATE TABLE IF NOT EXISTS module_config (
-            module TEXT PRIMARY KEY,
-            config TEXT NOT NULL,
-            enabled INTEGER DEFAULT 1,
-            last_run TIMESTAMP,
-            next_run TIMESTAMP,
-            interval_seconds INTEGER DEFAULT 3600
-        );
+        except Exception as e:
+            logger.error(f"Error running database maintenance: {str(e)}")
 
-        -- Proxy table
-        CREATE TABLE IF NOT EXISTS proxies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            proxy_string TEXT NOT NULL UNIQUE,
-            last_used TIMESTAMP,
-            success_count INTEGER DEFAULT 0,
-            fail_count INTEGER DEFAULT 0,
-            enabled INTEGER DEFAULT 1
-        );
+    @abstractmethod
+    def _run_maintenance(self, vacuum_due: bool):
+        """
+        Run the backend's ANALYZE and, if vacuum_due, vacuum commands
 
-        -- Tasks queue
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_type TEXT NOT NULL,
-            module TEXT NOT NULL,
-            priority INTEGER DEFAULT 5,
-            data TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            scheduled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            started_at TIMESTAMP,
-            completed_at TIMESTAMP,
-            status TEXT DEFAULT 'pending',
-            attempts INTEGER DEFAULT 0,
-            max_attempts INTEGER DEFAULT 3,
-            result TEXT,
-            error TEXT
-        );
+        Args:
+            vacuum_due: Whether to reclaim free space as well
+        """
 
-        -- Create index for task processing
-        CREATE INDEX IF NOT EXISTS idx_tasks_status_priority ON tasks(status, priority);
-        CREATE INDEX IF NOT EXISTS idx_tasks_module ON tasks(module);
+    def _count_writes(self, count: int):
+        """Count product writes, starting background maintenance when enough have accumulated"""
+        with self._maintenance_lock:
+            self._writes_since_analyze += count
+            if self._writes_since_analyze < ANALYZE_AFTER_WRITES or self._maintenance_running:
+                return
+            self._writes_since_analyze = 0
+            self._maintenance_running = True
 
-        -- Session cookies
-        CREATE TABLE IF NOT EXISTS cookies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            module TEXT NOT NULL,
-            domain TEXT NOT NULL,
-            cookies TEXT NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP,
-            UNIQUE(module, domain)
-        );
+        threading.Thread(target=self._background_maintenance, daemon=True).start()
 
-        -- Log table for debugging and metrics
-        CREATE TABLE IF NOT EXISTS logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            level TEXT NOT NULL,
-            module TEXT,
-            message TEXT NOT NULL,
-            data TEXT
-        );
+    def _background_maintenance(self):
+        """Run maintenance() on a background thread, allowing the next run once done"""
+        try:
+            self.maintenance()
+        finally:
+            with self._maintenance_lock:
+                self._maintenance_running = False
 
-        -- Create index for log filtering
-        CREATE INDEX IF NOT EXISTS idx_logs_level ON logs(level);
-        CREATE INDEX IF NOT EXISTS idx_logs_module ON logs(module);
-        CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp);
+    def add_product(self, product: Dict[str, Any]) -> bool:
+        """
+        Add a new product to the database
 
-        -- Webhook configurations
-        CREATE TABLE IF NOT EXISTS webhooks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            url TEXT NOT NULL,
-            type TEXT NOT NULL,
-            enabled INTEGER DEFAULT 1,
-            config TEXT,
-            UNIQUE(name)
-        );
+        Args:
+            product: Product data dictionary
 
-        -- Webhook event subscriptions
-        CREATE TABLE IF NOT EXISTS webhook_subscriptions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            webhook_id INTEGER REFERENCES webhooks(id) ON DELETE CASCADE,
-            event_type TEXT NOT NULL,
-            module TEXT,
-            filter TEXT,
-            UNIQUE(webhook_id, event_type, module)
-        );
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.add_products([product]):
+            return False
 
-        -- User-defined search queries
-        CREATE TABLE IF NOT EXISTS search_queries (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            module TEXT NOT NULL,
-            name TEXT NOT NULL,
-            url TEXT NOT NULL,
-            enabled INTEGER DEFAULT 1,
-            interval_seconds INTEGER DEFAULT 3600,
-            last_run TIMESTAMP,
-            next_run TIMESTAMP,
-            UNIQUE(module, name)
-        );
+        logger.info(f"Added/updated product: {product['pid']} - {product['title']}")
+        return True
+
+    @abstractmethod
+    def _json_param(self, value: Any) -> Any:
         """
+        Wrap a value for binding to a JSON column
 
-        cursor = self.connection.cursor()
-        cursor.executescript(schema_sql)
-        self.connection.commit()
-        cursor.close()
-        logger.info("Initialized SQLite database schema")
+        Args:
+            value: JSON-serializable value
 
-    def get_cursor(self):
-        """Get a database cursor"""
-        if not self.connection:
-            self.connect()
+        Returns:
+            Bindable parameter
+        """
 
-        if self.db_type == "postgres":
-            return self.connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        else:
-            return self.connection.cursor()
+    @abstractmethod
+    def _bool_param(self, value: bool) -> Any:
+        """Convert a boolean for binding to a boolean column"""
 
-    def add_product(self, product: Dict[str, Any]) -> bool:
+    @abstractmethod
+    def _now(self) -> Any:
         """
-        Add a new product to the database
+        Get the current UTC time as a bindable parameter
+
+        Computed once per batch instead of evaluating CURRENT_TIMESTAMP per
+        row.
+
+        Returns:
+            Timestamp in the form the backend's timestamp columns expect
+        """
+
+    def add_products(self, products: List[Dict[str, Any]]) -> bool:
+        """
+        Add or update several products in a single transaction
 
         Args:
-            product: Product data dictionary
+            products: Product data dictionaries
 
         Returns:
             bool: True if successful, False otherwise
         """
+        if not products:
+            return True
+
+        # One row per PID (the last one wins); an upsert can't touch a row twice
+        products = list({product["pid"]: product for product in products}.values())
+
+        now = self._now()
+
         try:
-            cursor = self.get_cursor()
-
-            # Convert JSON fields for database storage
-            data_json = json.dumps(product.get("data", {}))
-
-            if self.db_type == "postgres":
-                sql = """
-                INSERT INTO products 
-                    (pid, title, price, url, image_url, in_stock, data, module)
-                VALUES 
-                    (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (pid) DO UPDATE
-                SET 
-                    title = EXCLUDED.title,
-                    price = EXCLUDED.price,
-                    url = EXCLUDED.url,
-                    image_url = EXCLUDED.image_url,
-                    in_stock = EXCLUDED.in_stock,
-                    data = EXCLUDED.data,
-                    last_check = CURRENT_TIMESTAMP
-                """
-                cursor.execute(sql, (
-                    product["pid"],
-                    product["title"],
-                    product.get("price"),
-                    product.get("url"),
-                    product.get("image_url"),
-                    product.get("in_stock", False),
-                    data_json,
-                    product["module"]
-                ))
-            else:
-                # SQLite version
-                sql = """
-                INSERT INTO products 
-                    (pid, title, price, url, image_url, in_stock, data, module)
-                VALUES 
-                    (?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT (pid) DO UPDATE
-                SET 
-                    title = excluded.title,
-                    price = excluded.price,
-                    url = excluded.url,
-                    image_url = excluded.image_url,
-                    in_stock = excluded.in_stock,
-                    data = excluded.data,
-                    last_check = CURRENT_TIMESTAMP
-                """
-                cursor.execute(sql, (
-                    product["pid"],
-                    product["title"],
-                    product.get("price"),
-                    product.get("url"),
-                    product.get("image_url"),
-                    1 if product.get("in_stock", False) else 0,
-                    data_json,
-                    product["module"]
-                ))
+            with self.acquire() as (conn, cursor):
+                self._upsert_products(cursor, products, now)
 
-            self.connection.commit()
-            cursor.close()
-            logger.info(f"Added/updated product: {product['pid']} - {product['title']}")
-            return True
+                self._count_writes(len(products))
+                logger.debug(f"Added/updated {len(products)} products")
+                return True
 
         except Exception as e:
-            logger.error(f"Error adding product: {str(e)}")
-            if self.connection:
-                self.connection.rollback()
+            logger.error(f"Error adding products: {str(e)}")
             return False
 
-    def get_product(self, pid: str) -> Optional[Dict[str, Any]]:
+    @abstractmethod
+    def _upsert_products(self, cursor, products: List[Dict[str, Any]], now: Any):
         """
-        Get a product by PID
+        Insert or update products (one per PID) in a single batch
 
         Args:
+            cursor: Database cursor
+            products: Product data dictionaries
+            now: Timestamp from _now() for first_seen/last_check
+        """
+
+    @abstractmethod
+    def _swap_stock_status(self, cursor, pid: str, in_stock: bool, now: Any) -> Optional[bool]:
+        """
+        Set a product's stock status and return the one it replaced
+
+        Args:
+            cursor: Database cursor
             pid: Product ID
+            in_stock: New stock status
+            now: Timestamp from _now() for last_check and last_(out_of_)in_stock
 
         Returns:
-            Dict with product data or None if not found
+            Previous stock status, or None if the product doesn't exist
         """
-        try:
-            cursor = self.get_cursor()
-
-            sql = "SELECT * FROM products WHERE pid = ?"
-            if self.db_type == "postgres":
-                sql = sql.replace("?", "%s")
 
-            cursor.execute(sql, (pid,))
-            result = cursor.fetchone()
-            cursor.close()
+    @abstractmethod
+    def _product_from_row(self, row) -> Dict[str, Any]:
+        """Convert a products row to a product dictionary"""
 
-            if not result:
-                return None
+    def get_product(self, pid: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a product by PID
 
-            # Convert row to dictionary
-            if self.db_type == "postgres":
-                product = dict(result)
-            else:
-                product = {key: result[key] for key in result.keys()}
+        Args:
+            pid: Product ID
 
-            # Parse JSON data
-            if product.get("data"):
-                try:
-                    product["data"] = json.loads(product["data"])
-                except:
-                    product["data"] = {}
+        Returns:
+            Dict with product data or None if not found
+        """
+        try:
+            with self.acquire() as (conn, cursor):
+                cursor.execute(self._sql["get_product"], (pid,))
+                result = cursor.fetchone()
 
-            # Convert SQLite boolean to Python boolean
-            if self.db_type == "sqlite":
-                product["in_stock"] = bool(product["in_stock"])
+                if not result:
+                    return None
 
-            return product
+                return self._product_from_row(result)
 
         except Exception as e:
             logger.error(f"Error getting product {pid}: {str(e)}")
@@ -431,56 +566,81 @@ class Database:
             List of product dictionaries
         """
         try:
-            cursor = self.get_cursor()
-
-            # Build query based on parameters
-            sql = "SELECT * FROM products WHERE module = ?"
-            params = [module]
-
-            if in_stock is not None:
-                sql += " AND in_stock = ?"
-                in_stock_val = in_stock
-                if self.db_type == "sqlite":
-                    in_stock_val = 1 if in_stock else 0
-                params.append(in_stock_val)
-
-            sql += " ORDER BY last_check ASC LIMIT ?"
+            sql, params = self._module_products_query(module, in_stock)
+            sql += f" ORDER BY last_check ASC LIMIT {self.ph}"
             params.append(limit)
 
-            # Convert placeholders for Postgres
-            if self.db_type == "postgres":
-                sql = sql.replace("?", "%s")
-
-            cursor.execute(sql, params)
-            results = cursor.fetchall()
-            cursor.close()
+            with self.acquire() as (conn, cursor):
+                cursor.execute(sql, params)
+                return [self._product_from_row(row) for row in cursor.fetchall()]
 
-            products = []
-            for row in results:
-                # Convert row to dictionary
-                if self.db_type == "postgres":
-                    product = dict(row)
-                else:
-                    product = {key: row[key] for key in row.keys()}
-
-                # Parse JSON data
-                if product.get("data"):
-                    try:
-                        product["data"] = json.loads(product["data"])
-                    except:
-                        product["data"] = {}
+        except Exception as e:
+            logger.error(f"Error getting products for module {module}: {str(e)}")
+            return []
 
-                # Convert SQLite boolean to Python boolean
-                if self.db_type == "sqlite":
-                    product["in_stock"] = bool(product["in_stock"])
+    def iter_products_by_module(self, module: str, limit: Optional[int] = None,
+                                in_stock: Optional[bool] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream products for a specific module, least recently checked first
 
-                products.append(product)
+        Rows are read FETCH_BATCH_SIZE at a time, each page continuing after
+        the (last_check, pid) of the previous one, so only one page is held
+        in memory. The pooled connection is returned before a page is
+        yielded, so the caller can use the database while iterating.
+        Products checked after the scan started are left out, so updating
+        last_check while iterating doesn't yield a product twice. Unlike
+        get_products_by_module, errors are raised to the caller.
 
-            return products
+        Args:
+            module: Module name
+            limit: Maximum number of products to return (None for all)
+            in_stock: If provided, filter by in_stock status
 
-        except Exception as e:
-            logger.error(f"Error getting products for module {module}: {str(e)}")
-            return []
+        Yields:
+            Product dictionaries
+        """
+        base_sql, base_params = self._module_products_query(module, in_stock)
+        base_sql += f" AND last_check <= {self.ph}"
+        base_params.append(self._now())
+
+        remaining = limit
+        last_key = None
+        while remaining is None or remaining > 0:
+            page_size = FETCH_BATCH_SIZE if remaining is None else min(FETCH_BATCH_SIZE, remaining)
+            sql, params = base_sql, list(base_params)
+            if last_key is not None:
+                sql += f" AND (last_check, pid) > ({self.ph}, {self.ph})"
+                params.extend(last_key)
+            sql += f" ORDER BY last_check ASC, pid ASC LIMIT {self.ph}"
+            params.append(page_size)
+
+            with self.acquire() as (conn, cursor):
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+
+            if not rows:
+                return
+            last_key = (rows[-1]["last_check"], rows[-1]["pid"])
+
+            # The connection is back in the pool before anything is yielded
+            for row in rows:
+                yield self._product_from_row(row)
+
+            if len(rows) < page_size:
+                return
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def _module_products_query(self, module: str, in_stock: Optional[bool]) -> Tuple[str, List[Any]]:
+        """Build the SELECT for a module's products, optionally filtered by in_stock"""
+        sql = f"SELECT * FROM products WHERE module = {self.ph}"
+        params = [module]
+
+        if in_stock is not None:
+            sql += f" AND in_stock = {self.ph}"
+            params.append(self._bool_param(in_stock))
+
+        return sql, params
 
     def update_stock_status(self, pid: str, in_stock: bool,
                             stores: List[Dict[str, Any]] = None) -> bool:
@@ -496,103 +656,55 @@ class Database:
             bool: True if successful, False otherwise
         """
         try:
-            cursor = self.get_cursor()
-
-            # Get current stock status to check for changes
-            current_status_sql = "SELECT in_stock FROM products WHERE pid = ?"
-            if self.db_type == "postgres":
-                current_status_sql = current_status_sql.replace("?", "%s")
-
-            cursor.execute(current_status_sql, (pid,))
-            result = cursor.fetchone()
-
-            if not result:
-                logger.warning(f"Trying to update stock status for unknown product: {pid}")
-                cursor.close()
-                return False
-
-            # Get current status
-            current_in_stock = result[0]
-            if self.db_type == "sqlite":
-                current_in_stock = bool(current_in_stock)
-
-            # Update product status
-            if in_stock:
-                update_sql = """
-                UPDATE products
-                SET in_stock = ?, last_in_stock = CURRENT_TIMESTAMP, last_check = CURRENT_TIMESTAMP
-                WHERE pid = ?
-                """
-            else:
-                update_sql = """
-                UPDATE products
-                SET in_stock = ?, last_out_of_stock = CURRENT_TIMESTAMP, last_check = CURRENT_TIMESTAMP
-                WHERE pid = ?
-                """
-
-            if self.db_type == "postgres":
-                update_sql = update_sql.replace("?", "%s")
-                in_stock_val = in_stock
-            else:
-                in_stock_val = 1 if in_stock else 0
-
-            cursor.execute(update_sql, (in_stock_val, pid))
-
-            # If stock status has changed, log the event
-            if current_in_stock != in_stock:
-                alert_type = "in_stock" if in_stock else "out_of_stock"
-                message = f"Product is now {'IN STOCK' if in_stock else 'OUT OF STOCK'}"
-
-                alert_sql = """
-                INSERT INTO alert_history (pid, alert_type, message)
-                VALUES (?, ?, ?)
-                """
-
-                if self.db_type == "postgres":
-                    alert_sql = alert_sql.replace("?", "%s")
-
-                cursor.execute(alert_sql, (pid, alert_type, message))
-
-            # Update store availability if provided
-            if stores and in_stock:
-                for store_data in stores:
-                    # Add or update store
-                    store_id = self._ensure_store_exists(cursor, store_data)
-
-                    if store_id:
-                        # Update product availability for this store
-                        avail_sql = """
-                        INSERT INTO product_availability (pid, store_id, available, check_time)
-                        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                        ON CONFLICT (pid, store_id) DO UPDATE
-                        SET available = ?, check_time = CURRENT_TIMESTAMP
-                        """
-
-                        if self.db_type == "postgres":
-                            avail_sql = avail_sql.replace("?", "%s")
-                            avail_val = True
-                        else:
-                            avail_val = 1
-
-                        cursor.execute(avail_sql, (pid, store_id, avail_val, avail_val))
-
-            self.connection.commit()
-            cursor.close()
-
-            # Log the stock update event
-            if current_in_stock != in_stock:
-                logger.info(f"Stock status changed for {pid}: {'IN STOCK' if in_stock else 'OUT OF STOCK'}")
-                return True
-            else:
-                logger.debug(f"Stock status unchanged for {pid}: {'IN STOCK' if in_stock else 'OUT OF STOCK'}")
-                return False
+            with self.acquire() as (conn, cursor):
+                now = self._now()
+
+                current_in_stock = self._swap_stock_status(cursor, pid, in_stock, now)
+                if current_in_stock is None:
+                    logger.warning(f"Trying to update stock status for unknown product: {pid}")
+                    return False
+
+                # If stock status has changed, log the event
+                if current_in_stock != in_stock:
+                    alert_type = "in_stock" if in_stock else "out_of_stock"
+                    message = f"Product is now {'IN STOCK' if in_stock else 'OUT OF STOCK'}"
+
+                    cursor.execute(self._sql["add_alert"], (pid, alert_type, message))
+
+                # Update store availability if provided
+                if stores and in_stock:
+                    # Look up (or add) every store at once, then upsert availability in one batch
+                    store_ids = self._ensure_stores_exist(cursor, stores)
+                    avail_rows = [(pid, store_id, self._bool_param(True), now)
+                                  for store_id in store_ids.values()]
+
+                    if avail_rows:
+                        self._upsert_availability(cursor, avail_rows)
+
+                self._count_writes(1)
+
+                # Log the stock update event
+                if current_in_stock != in_stock:
+                    logger.info(f"Stock status changed for {pid}: {'IN STOCK' if in_stock else 'OUT OF STOCK'}")
+                    return True
+                else:
+                    logger.debug(f"Stock status unchanged for {pid}: {'IN STOCK' if in_stock else 'OUT OF STOCK'}")
+                    return False
 
         except Exception as e:
             logger.error(f"Error updating stock status for {pid}: {str(e)}")
-            if self.connection:
-                self.connection.rollback()
             return False
 
+    @abstractmethod
+    def _upsert_availability(self, cursor, rows: List[Tuple]):
+        """
+        Insert or update several product_availability rows
+
+        Args:
+            cursor: Database cursor
+            rows: (pid, store_id, available, check_time) tuples
+        """
+
     def _ensure_store_exists(self, cursor, store_data: Dict[str, Any]) -> Optional[int]:
         """
         Ensure a store exists in the database, adding it if needed
@@ -604,63 +716,107 @@ class Database:
         Returns:
             int: Store ID if successful, None otherwise
         """
+        store_ids = self._ensure_stores_exist(cursor, [store_data])
+        return next(iter(store_ids.values()), None)
+
+    def _ensure_stores_exist(self, cursor, stores: List[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
+        """
+        Ensure several stores exist in the database, adding the missing ones
+
+        Uses one batched lookup, one batched insert for missing stores and a
+        lookup of the new IDs, instead of a query (or two) per store.
+
+        Args:
+            cursor: Database cursor
+            stores: Store information dictionaries
+
+        Returns:
+            Dict mapping (store_id, module) to the store's database ID
+        """
         try:
-            store_id = store_data.get("store_id")
-            module = store_data.get("module")
+            wanted = {}
+            for store_data in stores:
+                store_id = store_data.get("store_id")
+                module = store_data.get("module")
+
+                if not store_id or not module:
+                    logger.error("Store data missing required fields: store_id and module")
+                    continue
+
+                wanted.setdefault((str(store_id), module), store_data)
+
+            if not wanted:
+                return {}
+
+            store_ids = self._lookup_store_ids(cursor, list(wanted))
+
+            missing = [key for key in wanted if key not in store_ids]
+            if missing:
+                rows = []
+                for store_id, module in missing:
+                    store_data = wanted[(store_id, module)]
+                    rows.append((
+                        store_id,
+                        store_data.get("name", ""),
+                        store_data.get("address", ""),
+                        store_data.get("city", ""),
+                        store_data.get("state", ""),
+                        store_data.get("zip", ""),
+                        store_data.get("phone", ""),
+                        store_data.get("latitude"),
+                        store_data.get("longitude"),
+                        module
+                    ))
+
+                store_ids.update(self._insert_stores(cursor, rows))
+
+            return store_ids
+
+        except Exception as e:
+            logger.error(f"Error ensuring stores exist: {str(e)}")
+            return {}
 
-            if not store_id or not module:
-                logger.error("Store data missing required fields: store_id and module")
-                return None
+    @abstractmethod
+    def _insert_stores(self, cursor, rows: List[Tuple]) -> Dict[Tuple[str, str], int]:
+        """
+        Insert stores and return their IDs
 
-            # Check if store already exists
-            check_sql = "SELECT id FROM stores WHERE store_id = ? AND module = ?"
-            if self.db_type == "postgres":
-                check_sql = check_sql.replace("?", "%s")
+        Stores that already exist (e.g. added concurrently) are left unchanged
+        but still have their IDs returned.
 
-            cursor.execute(check_sql, (store_id, module))
-            result = cursor.fetchone()
+        Args:
+            cursor: Database cursor
+            rows: Store rows in stores table column order
 
-            if result:
-                # Store exists, return its ID
-                return result[0]
+        Returns:
+            Dict mapping (store_id, module) to ID for every row
+        """
 
-            # Store doesn't exist, add it
-            insert_sql = """
-            INSERT INTO stores (
-                store_id, name, address, city, state, zip,
-                phone, latitude, longitude, module
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-
-            if self.db_type == "postgres":
-                insert_sql = insert_sql.replace("?", "%s")
-                # Get store ID using RETURNING clause
-                insert_sql += " RETURNING id"
-
-            params = (
-                store_id,
-                store_data.get("name", ""),
-                store_data.get("address", ""),
-                store_data.get("city", ""),
-                store_data.get("state", ""),
-                store_data.get("zip", ""),
-                store_data.get("phone", ""),
-                store_data.get("latitude"),
-                store_data.get("longitude"),
-                module
-            )
+    def _lookup_store_ids(self, cursor, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """
+        Get the database IDs of existing stores
 
-            if self.db_type == "postgres":
-                cursor.execute(insert_sql, params)
-                result = cursor.fetchone()
-                return result[0]
-            else:
-                cursor.execute(insert_sql, params)
-                return cursor.lastrowid
+        Args:
+            cursor: Database cursor
+            keys: (store_id, module) pairs
 
-        except Exception as e:
-            logger.error(f"Error ensuring store exists: {str(e)}")
-            return None
+        Returns:
+            Dict mapping (store_id, module) to ID for the stores that exist
+        """
+        store_ids = {}
+
+        # Two parameters per store, kept under SQLite's 999 variable limit
+        for start in range(0, len(keys), STORE_LOOKUP_BATCH):
+            batch = keys[start:start + STORE_LOOKUP_BATCH]
+            values = ", ".join([f"({self.ph}, {self.ph})"] * len(batch))
+            cursor.execute(
+                f"SELECT store_id, module, id FROM stores WHERE (store_id, module) IN (VALUES {values})",
+                [param for key in batch for param in key]
+            )
+            for row in cursor.fetchall():
+                store_ids[(row[0], row[1])] = row[2]
+
+        return store_ids
 
     def save_cookies(self, module: str, domain: str, cookies: Dict[str, str],
                      expires_hours: int = 24) -> bool:
@@ -677,49 +833,18 @@ class Database:
             bool: True if successful, False otherwise
         """
         try:
-            cursor = self.get_cursor()
-
-            # Calculate expiration timestamp
-            expires_at = datetime.now().timestamp() + (expires_hours * 3600)
-
-            # Convert cookies to JSON
-            cookies_json = json.dumps(cookies)
-
-            # Upsert cookies
-            sql = """
-            INSERT INTO cookies (module, domain, cookies, timestamp, expires_at)
-            VALUES (?, ?, ?, CURRENT_TIMESTAMP, datetime(?, 'unixepoch'))
-            ON CONFLICT (module, domain) DO UPDATE
-            SET cookies = ?, timestamp = CURRENT_TIMESTAMP, expires_at = datetime(?, 'unixepoch')
-            """
-
-            if self.db_type == "postgres":
-                sql = """
-                INSERT INTO cookies (module, domain, cookies, timestamp, expires_at)
-                VALUES (%s, %s, %s, CURRENT_TIMESTAMP, to_timestamp(%s))
-                ON CONFLICT (module, domain) DO UPDATE
-                SET cookies = %s, timestamp = CURRENT_TIMESTAMP, expires_at = to_timestamp(%s)
-                """
-                cursor.execute(sql, (
-                    module, domain, cookies_json, expires_at,
-                    cookies_json, expires_at
-                ))
-            else:
-                cursor.execute(sql, (
-                    module, domain, cookies_json, expires_at,
-                    cookies_json, expires_at
-                ))
+            with self.acquire() as (conn, cursor):
+                # Calculate expiration timestamp
+                expires_at = datetime.now().timestamp() + (expires_hours * 3600)
 
-            self.connection.commit()
-            cursor.close()
+                cookies_json = self._json_param(cookies)
+                cursor.execute(self._sql["save_cookies"], (module, domain, cookies_json, expires_at))
 
-            logger.info(f"Saved cookies for {module} on domain {domain}")
-            return True
+                logger.info(f"Saved cookies for {module} on domain {domain}")
+                return True
 
         except Exception as e:
             logger.error(f"Error saving cookies: {str(e)}")
-            if self.connection:
-                self.connection.rollback()
             return False
 
     def load_cookies(self, module: str, domain: str) -> Optional[Dict[str, str]]:
@@ -734,42 +859,22 @@ class Database:
             Dict: Cookie dictionary if valid, None otherwise
         """
         try:
-            cursor = self.get_cursor()
-
-            # Get cookies, checking expiration
-            if self.db_type == "postgres":
-                sql = """
-                SELECT cookies 
-                FROM cookies 
-                WHERE module = %s 
-                  AND domain = %s 
-                  AND expires_at > CURRENT_TIMESTAMP
-                """
-            else:
-                sql = """
-                SELECT cookies 
-                FROM cookies 
-                WHERE module = ? 
-                  AND domain = ? 
-                  AND expires_at > datetime('now')
-                """
-
-            cursor.execute(sql, (module, domain))
-            result = cursor.fetchone()
-            cursor.close()
-
-            if not result:
-                logger.info(f"No valid cookies found for {module} on domain {domain}")
-                return None
-
-            # Parse cookies JSON
-            try:
-                cookies = json.loads(result[0])
-                logger.info(f"Loaded cookies for {module} on domain {domain}")
-                return cookies
-            except json.JSONDecodeError:
-                logger.error(f"Error parsing cookies JSON for {module} on domain {domain}")
-                return None
+            with self.acquire() as (conn, cursor):
+                # Get cookies, checking expiration
+                cursor.execute(self._sql["load_cookies"], (module, domain))
+                result = cursor.fetchone()
+
+                if not result:
+                    logger.info(f"No valid cookies found for {module} on domain {domain}")
+                    return None
+
+                try:
+                    cookies = self._json_value(result[0])
+                    logger.info(f"Loaded cookies for {module} on domain {domain}")
+                    return cookies
+                except ValueError:
+                    logger.error(f"Error parsing cookies JSON for {module} on domain {domain}")
+                    return None
 
         except Exception as e:
             logger.error(f"Error loading cookies: {str(e)}")
@@ -791,48 +896,36 @@ class Database:
             int: Task ID if successful, None otherwise
         """
         try:
-            cursor = self.get_cursor()
-
-            # Convert data to JSON
-            data_json = json.dumps(data or {})
-
-            # Calculate scheduled_at timestamp
-            if self.db_type == "postgres":
-                scheduled_at_sql = f"CURRENT_TIMESTAMP + interval '{schedule_delay_seconds} seconds'"
-                sql = f"""
-                INSERT INTO tasks (
-                    task_type, module, data, priority, scheduled_at
-                ) VALUES (
-                    %s, %s, %s, %s, {scheduled_at_sql}
-                ) RETURNING id
-                """
-                cursor.execute(sql, (task_type, module, data_json, priority))
-                result = cursor.fetchone()
-                task_id = result[0]
-            else:
-                scheduled_at_sql = f"datetime('now', '+{schedule_delay_seconds} seconds')"
-                sql = f"""
-                INSERT INTO tasks (
-                    task_type, module, data, priority, scheduled_at
-                ) VALUES (
-                    ?, ?, ?, ?, {scheduled_at_sql}
-                )
-                """
-                cursor.execute(sql, (task_type, module, data_json, priority))
-                task_id = cursor.lastrowid
-
-            self.connection.commit()
-            cursor.close()
-
-            logger.info(f"Added task {task_id}: {task_type} for {module}")
-            return task_id
+            with self.acquire() as (conn, cursor):
+                # Convert data to JSON
+                data_json = self._json_param(data or {})
+
+                cursor.execute(self._sql["add_task"], (task_type, module, data_json, priority, schedule_delay_seconds))
+                task_id = self._inserted_id(cursor)
+
+                logger.info(f"Added task {task_id}: {task_type} for {module}")
+                return task_id
 
         except Exception as e:
             logger.error(f"Error adding task: {str(e)}")
-            if self.connection:
-                self.connection.rollback()
             return None
 
+    @abstractmethod
+    def _inserted_id(self, cursor) -> int:
+        """Get the id of the row the cursor's last INSERT (with returning_id_sql) added"""
+
+    @abstractmethod
+    def _json_value(self, value: Any) -> Any:
+        """
+        Decode a value read from a JSON column
+
+        Args:
+            value: Column value
+
+        Returns:
+            Decoded value; raises ValueError if it isn't valid JSON
+        """
+
     def get_next_task(self, module: str = None) -> Optional[Dict[str, Any]]:
         """
         Get the next task to execute from the queue
@@ -843,70 +936,93 @@ class Database:
         Returns:
             Dict: Task data if available, None otherwise
         """
+        tasks = self.get_next_tasks(1, module)
+        return tasks[0] if tasks else None
+
+    def get_next_tasks(self, limit: int, module: str = None) -> List[Dict[str, Any]]:
+        """
+        Claim up to `limit` tasks from the queue in one statement
+
+        Args:
+            limit: Maximum number of tasks to claim
+            module: Optional module filter
+
+        Returns:
+            List: Claimed tasks, highest priority first (empty if none are due)
+        """
         try:
-            cursor = self.get_cursor()
-
-            # Build query based on parameters
-            base_sql = """
-            SELECT id, task_type, module, data, priority, created_at, scheduled_at, attempts, max_attempts
-            FROM tasks
-            WHERE status = 'pending'
-              AND scheduled_at <= CURRENT_TIMESTAMP
-            """
-
-            params = []
-            if module:
-                base_sql += " AND module = ?"
-                params.append(module)
-
-                if self.db_type == "postgres":
-                    base_sql = base_sql.replace("?", "%s")
-
-            # Order by priority (desc) and scheduled_at (asc)
-            base_sql += " ORDER BY priority DESC, scheduled_at ASC LIMIT 1"
-
-            cursor.execute(base_sql, params)
-            result = cursor.fetchone()
-
-            if not result:
-                cursor.close()
-                return None
-
-            # Convert row to dictionary
-            if self.db_type == "postgres":
-                task = dict(result)
-            else:
-                task = {key: result[key] for key in result.keys()}
-
-            # Parse JSON data
-            if task.get("data"):
-                try:
-                    task["data"] = json.loads(task["data"])
-                except:
-                    task["data"] = {}
+            with self.acquire() as (conn, cursor):
+                rows = self._claim_tasks(cursor, module, limit)
+
+            tasks = []
+            for row in rows:
+                # Convert row to dictionary
+                task = dict(row)
 
-            # Mark task as running
-            update_sql = """
-            UPDATE tasks
-            SET status = 'running', started_at = CURRENT_TIMESTAMP, attempts = attempts + 1
-            WHERE id = ?
-            """
+                if task.get("data"):
+                    try:
+                        task["data"] = self._json_value(task["data"])
+                    except ValueError:
+                        task["data"] = {}
 
-            if self.db_type == "postgres":
-                update_sql = update_sql.replace("?", "%s")
+                tasks.append(task)
 
-            cursor.execute(update_sql, (task["id"],))
-            self.connection.commit()
-            cursor.close()
+            # RETURNING doesn't preserve the subquery's order
+            tasks.sort(key=lambda task: (-task["priority"], task["scheduled_at"]))
 
-            logger.info(f"Started task {task['id']}: {task['task_type']} for {task['module']}")
-            return task
+            for task in tasks:
+                logger.info(f"Started task {task['id']}: {task['task_type']} for {task['module']}")
+            return tasks
 
         except Exception as e:
-            logger.error(f"Error getting next task: {str(e)}")
-            if self.connection:
-                self.connection.rollback()
-            return None
+            logger.error(f"Error getting next tasks: {str(e)}")
+            return []
+
+    def _claim_tasks(self, cursor, module: Optional[str], limit: int) -> List[Any]:
+        """
+        Mark the next due pending tasks as running and return them
+
+        Args:
+            cursor: Database cursor
+            module: Optional module filter
+            limit: Maximum number of tasks to claim
+
+        Returns:
+            Claimed task rows
+        """
+        next_sql, params = self._next_tasks_query(module, limit)
+
+        # Claim in one statement; see claim_lock_sql for how concurrent claims are kept apart
+        cursor.execute(f"""
+        UPDATE tasks
+        SET status = 'running', started_at = CURRENT_TIMESTAMP, attempts = attempts + 1
+        WHERE id IN ({next_sql.format(columns="id")}{self.claim_lock_sql})
+        RETURNING {TASK_COLUMNS}
+        """, params)
+        return cursor.fetchall()
+
+    def _next_tasks_query(self, module: Optional[str], limit: int) -> Tuple[str, List[Any]]:
+        """
+        Build the SELECT for the next due pending tasks
+
+        Returns:
+            SQL with a {columns} field to fill in, and its parameters
+        """
+        module_filter = ""
+        params = []
+        if module:
+            module_filter = f" AND module = {self.ph}"
+            params.append(module)
+        params.append(limit)
+
+        # Highest priority first, then earliest scheduled
+        next_sql = f"""
+        SELECT {{columns}} FROM tasks
+        WHERE status = 'pending'
+          AND scheduled_at <= CURRENT_TIMESTAMP{module_filter}
+        ORDER BY priority DESC, scheduled_at ASC LIMIT {self.ph}
+        """
+        return next_sql, params
 
     def complete_task(self, task_id: int, result: Dict[str, Any] = None) -> bool:
         """
@@ -920,32 +1036,14 @@ class Database:
             bool: True if successful, False otherwise
         """
         try:
-            cursor = self.get_cursor()
-
-            # Convert result to JSON
-            result_json = json.dumps(result or {})
-
-            # Update task status
-            sql = """
-            UPDATE tasks
-            SET status = 'completed', completed_at = CURRENT_TIMESTAMP, result = ?
-            WHERE id = ?
-            """
-
-            if self.db_type == "postgres":
-                sql = sql.replace("?", "%s")
-
-            cursor.execute(sql, (result_json, task_id))
-            self.connection.commit()
-            cursor.close()
+            with self.acquire() as (conn, cursor):
+                cursor.execute(self._sql["complete_task"], (self._now(), self._json_param(result or {}), task_id))
 
             logger.info(f"Completed task {task_id}")
             return True
 
         except Exception as e:
             logger.error(f"Error completing task {task_id}: {str(e)}")
-            if self.connection:
-                self.connection.rollback()
             return False
 
     def fail_task(self, task_id: int, error: str, retry: bool = True) -> bool:
@@ -961,76 +1059,45 @@ class Database:
             bool: True if successful, False otherwise
         """
         try:
-            cursor = self.get_cursor()
-
-            # Get current task info
-            info_sql = "SELECT attempts, max_attempts FROM tasks WHERE id = ?"
-            if self.db_type == "postgres":
-                info_sql = info_sql.replace("?", "%s")
-
-            cursor.execute(info_sql, (task_id,))
-            result = cursor.fetchone()
-
-            if not result:
-                logger.warning(f"Task {task_id} not found for fail_task")
-                cursor.close()
-                return False
-
-            attempts = result[0]
-            max_attempts = result[1]
-
-            # Determine status based on retry flag and attempt counts
-            if retry and attempts < max_attempts:
-                # Schedule for retry with exponential backoff
-                backoff_seconds = 60 * (2 ** (attempts - 1))  # 1min, 2min, 4min, 8min, etc.
-
-                if self.db_type == "postgres":
-                    scheduled_at_sql = f"CURRENT_TIMESTAMP + interval '{backoff_seconds} seconds'"
-                    status_sql = """
-                    UPDATE tasks
-                    SET status = 'pending', 
-                        error = %s,
-                        scheduled_at = {scheduled_at_sql}
-                    WHERE id = %s
-                    """.format(scheduled_at_sql=scheduled_at_sql)
+            with self.acquire() as (conn, cursor):
+                # The statement decides between retry and permanent failure
+                # from the task's current attempt counts
+                retry_val = self._bool_param(retry)
+                cursor.execute(self._sql["fail_task"], (retry_val, error, retry_val, retry_val, task_id))
+
+                result = self._failed_task_status(cursor, task_id)
+
+                if not result:
+                    logger.warning(f"Task {task_id} not found for fail_task")
+                    return False
+
+                status, attempts = result[0], result[1]
+                if status == "pending":
+                    backoff_seconds = 60 * (2 ** (attempts - 1))
+                    logger.info(f"Task {task_id} failed, scheduled for retry in {backoff_seconds} seconds")
                 else:
-                    scheduled_at_sql = f"datetime('now', '+{backoff_seconds} seconds')"
-                    status_sql = """
-                    UPDATE tasks
-                    SET status = 'pending', 
-                        error = ?,
-                        scheduled_at = {scheduled_at_sql}
-                    WHERE id = ?
-                    """.format(scheduled_at_sql=scheduled_at_sql)
-
-                cursor.execute(status_sql, (error, task_id))
-                logger.info(f"Task {task_id} failed, scheduled for retry in {backoff_seconds} seconds")
-            else:
-                # Mark as failed permanently
-                status_sql = """
-                UPDATE tasks
-                SET status = 'failed', 
-                    completed_at = CURRENT_TIMESTAMP, 
-                    error = ?
-                WHERE id = ?
-                """
-
-                if self.db_type == "postgres":
-                    status_sql = status_sql.replace("?", "%s")
-
-                cursor.execute(status_sql, (error, task_id))
-                logger.info(f"Task {task_id} failed permanently: {error}")
-
-            self.connection.commit()
-            cursor.close()
-            return True
+                    logger.info(f"Task {task_id} failed permanently: {error}")
+
+                return True
 
         except Exception as e:
             logger.error(f"Error failing task {task_id}: {str(e)}")
-            if self.connection:
-                self.connection.rollback()
             return False
 
+    def _failed_task_status(self, cursor, task_id: int) -> Optional[Tuple[str, int]]:
+        """
+        Get the status and attempts fail_task left a task with
+
+        Args:
+            cursor: Database cursor that just ran the fail_task statement
+            task_id: Task ID
+
+        Returns:
+            (status, attempts), or None if the task doesn't exist
+        """
+        # Reported by the statement's RETURNING clause
+        return cursor.fetchone()
+
     def log_event(self, level: str, module: str, message: str, data: Dict[str, Any] = None) -> bool:
         """
         Log an event to the database
@@ -1041,36 +1108,72 @@ class Database:
             message: Log message
             data: Additional data
 
-        Returns:
-            bool: True if successful, False otherwise
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            # Written by the background flush, batched with other log entries
+            self._queue_log((level, module, message, self._json_param(data or {}), self._now()))
+            return True
+
+        except Exception as e:
+            logger.error(f"Error logging event: {str(e)}")
+            return False
+
+    def _queue_log(self, row: Tuple):
+        """Queue a log entry for the background flush, starting the flusher if needed"""
+        with self._pending_lock:
+            self._pending_logs.append(row)
+            if self._flush_thread is None:
+                self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flush_thread.start()
+                # The flusher is a daemon thread, so write out what's left at exit
+                atexit.register(self.flush)
+
+    def _flush_loop(self):
+        """Flush queued writes every WRITE_FLUSH_INTERVAL until stopped"""
+        while not self._flush_stop.wait(WRITE_FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self) -> bool:
         """
-        try:
-            cursor = self.get_cursor()
+        Write queued log entries in one transaction
 
-            # Convert data to JSON
-            data_json = json.dumps(data or {})
+        Runs periodically in the background, on disconnect and at exit; call
+        it directly when queued entries must be visible immediately. Entries
+        that fail to write stay queued for the next flush.
 
-            # Insert log entry
-            sql = """
-            INSERT INTO logs (level, module, message, data)
-            VALUES (?, ?, ?, ?)
-            """
-
-            if self.db_type == "postgres":
-                sql = sql.replace("?", "%s")
+        Returns:
+            bool: True if successful (or nothing was queued), False otherwise
+        """
+        with self._pending_lock:
+            logs, self._pending_logs = self._pending_logs, []
 
-            cursor.execute(sql, (level, module, message, data_json))
-            self.connection.commit()
-            cursor.close()
+        if not logs:
+            return True
 
+        try:
+            with self.acquire() as (conn, cursor):
+                self._write_logs(cursor, logs)
             return True
 
         except Exception as e:
-            logger.error(f"Error logging event: {str(e)}")
-            if self.connection:
-                self.connection.rollback()
+            # Put them back ahead of anything queued meanwhile, keeping the order
+            with self._pending_lock:
+                self._pending_logs[:0] = logs
+            logger.error(f"Error flushing {len(logs)} log entries: {str(e)}")
             return False
 
+    @abstractmethod
+    def _write_logs(self, cursor, rows: List[Tuple]):
+        """
+        Insert several log entries
+
+        Args:
+            cursor: Database cursor
+            rows: (level, module, message, data, timestamp) tuples
+        """
+
     def get_module_config(self, module: str) -> Optional[Dict[str, Any]]:
         """
         Get configuration for a module
@@ -1081,38 +1184,33 @@ class Database:
         Returns:
             Dict: Module configuration if found, None otherwise
         """
-        try:
-            cursor = self.get_cursor()
-
-            sql = "SELECT * FROM module_config WHERE module = ?"
-            if self.db_type == "postgres":
-                sql = sql.replace("?", "%s")
+        cached = self._module_config_cache.get(module)
+        if cached and time.monotonic() - cached[0] < MODULE_CONFIG_TTL:
+            # Callers may modify what they get back, so hand out a copy
+            return copy.deepcopy(cached[1])
 
-            cursor.execute(sql, (module,))
-            result = cursor.fetchone()
-            cursor.close()
+        try:
+            read_at = time.monotonic()
+            with self.acquire() as (conn, cursor):
+                cursor.execute(self._sql["get_module_config"], (module,))
+                result = cursor.fetchone()
 
-            if not result:
-                return None
+                if not result:
+                    return None
 
-            # Convert row to dictionary
-            if self.db_type == "postgres":
                 config = dict(result)
-            else:
-                config = {key: result[key] for key in result.keys()}
 
-            # Parse JSON config
-            if config.get("config"):
-                try:
-                    config["config"] = json.loads(config["config"])
-                except:
-                    config["config"] = {}
+                if config.get("config"):
+                    try:
+                        config["config"] = self._json_value(config["config"])
+                    except ValueError:
+                        config["config"] = {}
 
-            # Convert SQLite boolean to Python boolean
-            if self.db_type == "sqlite":
+                # SQLite stores booleans as integers
                 config["enabled"] = bool(config["enabled"])
 
-            return config
+                self._module_config_cache[module] = (read_at, copy.deepcopy(config))
+                return config
 
         except Exception as e:
             logger.error(f"Error getting config for module {module}: {str(e)}")
@@ -1133,56 +1231,23 @@ class Database:
             bool: True if successful, False otherwise
         """
         try:
-            cursor = self.get_cursor()
-
-            # Convert config to JSON
-            config_json = json.dumps(config or {})
-
-            # Build the query and parameters
-            params = [config_json, module]
-
-            if self.db_type == "postgres":
-                sql = """
-                INSERT INTO module_config (module, config, enabled)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (module) DO UPDATE
-                SET config = %s
-                """
-                # Add enabled parameter
-                enabled_val = enabled
-                params = [module, config_json, enabled_val, config_json]
-
-                # Add interval if provided
-                if interval_seconds is not None:
-                    sql = sql[:-1] + ", interval_seconds = %s"
-                    params.append(interval_seconds)
-            else:
-                sql = """
-                INSERT INTO module_config (module, config, enabled)
-                VALUES (?, ?, ?)
-                ON CONFLICT (module) DO UPDATE
-                SET config = ?
-                """
-                # Add enabled parameter
-                enabled_val = 1 if enabled else 0
-                params = [module, config_json, enabled_val, config_json]
-
-                # Add interval if provided
-                if interval_seconds is not None:
-                    sql = sql[:-1] + ", interval_seconds = ?"
-                    params.append(interval_seconds)
-
-            cursor.execute(sql, params)
-            self.connection.commit()
-            cursor.close()
+            with self.acquire() as (conn, cursor):
+                # Convert config to JSON
+                config_json = self._json_param(config or {})
+
+                # A None interval leaves the stored one unchanged
+                cursor.execute(self._sql["update_module_config"], (
+                    module, config_json, self._bool_param(enabled), interval_seconds
+                ))
 
+            self._module_config_cache.pop(module, None)
+            # Enabling or adding a module changes the schedule
+            self._schedule_loaded_at = None
             logger.info(f"Updated config for module {module}")
             return True
 
         except Exception as e:
             logger.error(f"Error updating config for module {module}: {str(e)}")
-            if self.connection:
-                self.connection.rollback()
             return False
 
     def update_module_run_info(self, module: str, next_run_seconds: int = None) -> bool:
@@ -1197,53 +1262,28 @@ class Database:
             bool: True if successful, False otherwise
         """
         try:
-            cursor = self.get_cursor()
-
-            # Get module interval if next_run_seconds not provided
-            if next_run_seconds is None:
-                interval_sql = "SELECT interval_seconds FROM module_config WHERE module = ?"
-                if self.db_type == "postgres":
-                    interval_sql = interval_sql.replace("?", "%s")
+            with self.acquire() as (conn, cursor):
+                # Get module interval if next_run_seconds not provided
+                if next_run_seconds is None:
+                    cursor.execute(self._sql["get_module_interval"], (module,))
+                    result = cursor.fetchone()
 
-                cursor.execute(interval_sql, (module,))
-                result = cursor.fetchone()
+                    if not result:
+                        logger.warning(f"Module {module} not found in config")
+                        return False
 
-                if not result:
-                    logger.warning(f"Module {module} not found in config")
-                    cursor.close()
-                    return False
+                    next_run_seconds = result[0]
 
-                next_run_seconds = result[0]
-
-            # Update last run and next run times
-            if self.db_type == "postgres":
-                next_run_sql = f"CURRENT_TIMESTAMP + interval '{next_run_seconds} seconds'"
-                sql = f"""
-                UPDATE module_config
-                SET last_run = CURRENT_TIMESTAMP,
-                    next_run = {next_run_sql}
-                WHERE module = %s
-                """
-            else:
-                next_run_sql = f"datetime('now', '+{next_run_seconds} seconds')"
-                sql = f"""
-                UPDATE module_config
-                SET last_run = CURRENT_TIMESTAMP,
-                    next_run = {next_run_sql}
-                WHERE module = ?
-                """
-
-            cursor.execute(sql, (module,))
-            self.connection.commit()
-            cursor.close()
+                # Update last run and next run times
+                cursor.execute(self._sql["update_module_run"], (next_run_seconds, module))
 
+            self._module_config_cache.pop(module, None)
+            self._reschedule_module(module, time.time() + next_run_seconds)
             logger.info(f"Updated run info for module {module}, next run in {next_run_seconds} seconds")
             return True
 
         except Exception as e:
             logger.error(f"Error updating run info for module {module}: {str(e)}")
-            if self.connection:
-                self.connection.rollback()
             return False
 
     def get_due_modules(self) -> List[str]:
@@ -1254,33 +1294,668 @@ class Database:
             List: Module names
         """
         try:
-            cursor = self.get_cursor()
+            with self._schedule_lock:
+                if (self._schedule_loaded_at is None
+                        or time.monotonic() - self._schedule_loaded_at >= SCHEDULE_REFRESH_INTERVAL):
+                    self._load_schedule()
+
+                # Move modules whose time has come from the heap to the due set;
+                # they stay due until update_module_run_info reschedules them
+                now = time.time()
+                heap = self._schedule_heap
+                while heap and heap[0][0] <= now:
+                    next_run, module = heapq.heappop(heap)
+                    # Skip entries superseded by a later reschedule
+                    if self._schedule.get(module) == next_run:
+                        self._due_modules.add(module)
+
+                return list(self._due_modules)
+
+        except Exception as e:
+            logger.error(f"Error getting due modules: {str(e)}")
+            return []
 
-            sql = """
-            SELECT module
-            FROM module_config
-            WHERE enabled = ?
-              AND (next_run IS NULL OR next_run <= CURRENT_TIMESTAMP)
-            """
+    def _load_schedule(self):
+        """Reload enabled modules' next run times from the database (schedule lock held)"""
+        with self.acquire() as (conn, cursor):
+            cursor.execute(self._sql["get_module_schedule"], (self._bool_param(True),))
+            rows = cursor.fetchall()
+
+        # Modules that have never run are due straight away
+        self._schedule = {row[0]: float(row[1]) if row[1] is not None else 0.0 for row in rows}
+        self._schedule_heap = [(next_run, module) for module, next_run in self._schedule.items()]
+        heapq.heapify(self._schedule_heap)
+        self._due_modules.clear()
+        self._schedule_loaded_at = time.monotonic()
+
+    def _reschedule_module(self, module: str, next_run: float):
+        """Record a module's new next run time (epoch seconds)"""
+        with self._schedule_lock:
+            # Modules outside the schedule are disabled or not loaded yet
+            if module not in self._schedule:
+                return
+            self._schedule[module] = next_run
+            heapq.heappush(self._schedule_heap, (next_run, module))
+            self._due_modules.discard(module)
+
+
+class PostgresDatabase(Database):
+    """Database backed by a PostgreSQL connection pool"""
+
+    db_type = "postgres"
+    ph = "%s"
+    delay_sql = "CURRENT_TIMESTAMP + {ph} * interval '1 second'"
+    epoch_sql = "EXTRACT(EPOCH FROM {column})"
+    from_epoch_sql = "to_timestamp({ph})"
+    returning_id_sql = " RETURNING id"
+    # Rows locked by other workers' claims are skipped rather than waited on
+    claim_lock_sql = " FOR UPDATE SKIP LOCKED"
+    has_returning = True
 
-            if self.db_type == "postgres":
-                sql = sql.replace("?", "%s")
-                enabled_val = True
-            else:
-                enabled_val = 1
+    def _load_config_from_env(self):
+        self.config = {
+            "host": os.environ.get("DB_HOST", "localhost"),
+            "port": os.environ.get("DB_PORT", 5432),
+            "database": os.environ.get("DB_NAME", "stockchecker"),
+            "user": os.environ.get("DB_USER", "postgres"),
+            "password": os.environ.get("DB_PASSWORD", ""),
+        }
+
+    def _connect(self):
+        self._pool = psycopg2.pool.ThreadedConnectionPool(
+            POSTGRES_POOL_MIN,
+            POSTGRES_POOL_MAX,
+            host=self.config.get("host"),
+            port=self.config.get("port"),
+            database=self.config.get("database"),
+            user=self.config.get("user"),
+            password=self.config.get("password")
+        )
+        # Configure connections to handle JSON
+        psycopg2.extras.register_default_jsonb(globally=True, loads=_json_loads)
+        logger.info(f"Connected to PostgreSQL database: {self.config.get('database')}")
+
+    def _run_maintenance(self, vacuum_due: bool):
+        # VACUUM can't run inside a transaction block
+        connection = self._pool.getconn()
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                if vacuum_due:
+                    cursor.execute("VACUUM (ANALYZE) products")
+                    cursor.execute("VACUUM (ANALYZE) product_availability")
+                else:
+                    cursor.execute("ANALYZE products")
+                    cursor.execute("ANALYZE product_availability")
+        finally:
+            connection.autocommit = False
+            self._pool.putconn(connection)
+
+    def _new_cursor(self, connection):
+        return connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+
+    def _json_param(self, value: Any) -> Any:
+        # Adapted for the JSONB columns
+        return psycopg2.extras.Json(value, dumps=_json_dumps)
+
+    def _bool_param(self, value: bool) -> Any:
+        return value
+
+    def _now(self) -> Any:
+        return datetime.now(timezone.utc)
+
+    def _json_value(self, value: Any) -> Any:
+        # JSONB is already decoded by psycopg2
+        return value
+
+    def _inserted_id(self, cursor) -> int:
+        return cursor.fetchone()[0]
+
+    def _product_from_row(self, row) -> Dict[str, Any]:
+        # JSONB data is already decoded by psycopg2
+        return dict(row)
+
+    def _upsert_products(self, cursor, products: List[Dict[str, Any]], now: Any):
+        rows = [
+            (
+                product["pid"],
+                product["title"],
+                product.get("price"),
+                product.get("url"),
+                product.get("image_url"),
+                product.get("in_stock", False),
+                psycopg2.extras.Json(product.get("data", {}), dumps=_json_dumps),
+                product["module"],
+                now,
+                now
+            )
+            for product in products
+        ]
+        sql = """
+        INSERT INTO products 
+            (pid, title, price, url, image_url, in_stock, data, module, first_seen, last_check)
+        VALUES %s
+        ON CONFLICT (pid) DO UPDATE
+        SET 
+            title = EXCLUDED.title,
+            price = EXCLUDED.price,
+            url = EXCLUDED.url,
+            image_url = EXCLUDED.image_url,
+            in_stock = EXCLUDED.in_stock,
+            data = EXCLUDED.data,
+            last_check = EXCLUDED.last_check
+        """
+        psycopg2.extras.execute_values(cursor, sql, rows, page_size=500)
+
+    def _swap_stock_status(self, cursor, pid: str, in_stock: bool, now: Any) -> Optional[bool]:
+        stamp_column = "last_in_stock" if in_stock else "last_out_of_stock"
+
+        # Read the old status and write the new one in a single round trip
+        cursor.execute(f"""
+        WITH old AS (
+            SELECT in_stock FROM products WHERE pid = %s FOR UPDATE
+        )
+        UPDATE products
+        SET in_stock = %s, {stamp_column} = %s, last_check = %s
+        FROM old
+        WHERE products.pid = %s
+        RETURNING old.in_stock
+        """, (pid, in_stock, now, now, pid))
+        result = cursor.fetchone()
+
+        return result[0] if result else None
+
+    def _upsert_availability(self, cursor, rows: List[Tuple]):
+        psycopg2.extras.execute_values(cursor, """
+        INSERT INTO product_availability (pid, store_id, available, check_time)
+        VALUES %s
+        ON CONFLICT (pid, store_id) DO UPDATE
+        SET available = EXCLUDED.available, check_time = EXCLUDED.check_time
+        """, rows)
+
+    def _insert_stores(self, cursor, rows: List[Tuple]) -> Dict[Tuple[str, str], int]:
+        results = psycopg2.extras.execute_values(
+            cursor, INSERT_STORES_SQL.format(values="%s"), rows, page_size=500, fetch=True
+        )
+        return {(row[0], row[1]): row[2] for row in results}
+
+    def _write_logs(self, cursor, rows: List[Tuple]):
+        psycopg2.extras.execute_values(cursor, """
+        INSERT INTO logs (level, module, message, data, timestamp) VALUES %s
+        """, rows, page_size=500)
+
+
+class SQLiteDatabase(Database):
+    """Database backed by a pool of SQLite connections"""
+
+    db_type = "sqlite"
+    ph = "?"
+    delay_sql = "datetime('now', '+' || {ph} || ' seconds')"
+    epoch_sql = "CAST(strftime('%s', {column}) AS REAL)"
+    from_epoch_sql = "datetime({ph}, 'unixepoch')"
+    returning_id_sql = ""
+    # A SQLite statement holds the write lock throughout, so no lock clause is needed
+    claim_lock_sql = ""
+    has_returning = SQLITE_HAS_RETURNING
 
-            cursor.execute(sql, (enabled_val,))
-            results = cursor.fetchall()
-            cursor.close()
+    def __init__(self, config: Dict[str, Any] = None):
+        # Last known in_stock per PID, least recently used first
+        self._stock_cache: "OrderedDict[str, bool]" = OrderedDict()
+        self._stock_cache_lock = threading.Lock()
+        super().__init__(config)
 
-            # Extract module names
-            modules = [row[0] for row in results]
+    def _load_config_from_env(self):
+        self.config = {
+            "database": os.environ.get("DB_FILE", "stockchecker.db"),
+        }
+
+    def _connect(self):
+        db_path = Path(self.config.get("database", "stockchecker.db"))
+        # Each connection to :memory: is a separate database, so only open one
+        pool_size = 1 if str(db_path) == ":memory:" else SQLITE_POOL_SIZE
+        self._pool = _SQLitePool(pool_size)
+        for _ in range(pool_size):
+            self._pool.put(self._open_sqlite_connection(db_path))
+        logger.info(f"Connected to SQLite database: {db_path}")
+
+        # Initialize SQLite database if needed
+        self._init_sqlite_schema()
+
+        # Cheap; only analyzes tables whose statistics look stale
+        with self.acquire() as (conn, cursor):
+            cursor.execute("PRAGMA optimize")
+
+    def _open_sqlite_connection(self, db_path: Path) -> sqlite3.Connection:
+        """Open a SQLite connection that can be handed between threads"""
+        # Room for every distinct statement text we run, so each is compiled
+        # once per connection and then reused from the statement cache
+        connection = sqlite3.connect(db_path, check_same_thread=False, cached_statements=SQLITE_CACHED_STATEMENTS)
+        # Enable foreign keys
+        connection.execute("PRAGMA foreign_keys = ON")
+        # Lets maintenance() return free pages; only takes effect on a new database
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # WAL lets readers run alongside the writer; it doesn't apply to :memory:
+        if str(db_path) != ":memory:":
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA wal_autocheckpoint = 1000")
+        # With WAL, NORMAL only syncs at checkpoints instead of on every commit
+        for pragma in SQLITE_PRAGMAS:
+            connection.execute(f"PRAGMA {pragma}")
+        # Configure connection to handle JSON
+        connection.row_factory = sqlite3.Row
+        return connection
 
-            return modules
+    def _init_sqlite_schema(self):
+        """Initialize SQLite database schema if needed"""
+        # Define SQLite-compatible schema. executescript() runs in autocommit
+        # mode, so the explicit transaction makes it a single commit (and
+        # fsync) rather than one per statement.
+        schema_sql = """
+        BEGIN;
 
-        except Exception as e:
-            logger.error(f"Error getting due modules: {str(e)}")
-            return []
+        -- Products table
+        CREATE TABLE IF NOT EXISTS products (
+            pid TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            price REAL,
+            url TEXT,
+            image_url TEXT,
+            first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_check TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            in_stock INTEGER DEFAULT 0,
+            last_in_stock TIMESTAMP,
+            last_out_of_stock TIMESTAMP,
+            data TEXT,
+            module TEXT NOT NULL
+        );
+
+        -- Create index for faster searches
+        CREATE INDEX IF NOT EXISTS idx_products_in_stock ON products(in_stock);
+        CREATE INDEX IF NOT EXISTS idx_products_module ON products(module);
+        CREATE INDEX IF NOT EXISTS idx_products_module_stock_check ON products(module, in_stock, last_check);
+
+        -- Stores table
+        CREATE TABLE IF NOT EXISTS stores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            store_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            address TEXT,
+            city TEXT,
+            state TEXT,
+            zip TEXT,
+            phone TEXT,
+            latitude REAL,
+            longitude REAL,
+            module TEXT NOT NULL,
+            UNIQUE(store_id, module)
+        );
+
+        -- Product availability in stores
+        CREATE TABLE IF NOT EXISTS product_availability (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pid TEXT REFERENCES products(pid),
+            store_id INTEGER REFERENCES stores(id),
+            available INTEGER DEFAULT 0,
+            check_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            quantity INTEGER,
+            price REAL,
+            UNIQUE(pid, store_id)
+        );
+
+        -- Create index for faster lookups
+        CREATE INDEX IF NOT EXISTS idx_product_availability_pid ON product_availability(pid);
+        CREATE INDEX IF NOT EXISTS idx_product_availability_store ON product_availability(store_id);
+
+        -- Alert history
+        CREATE TABLE IF NOT EXISTS alert_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pid TEXT REFERENCES products(pid),
+            alert_type TEXT NOT NULL,
+            alert_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            message TEXT,
+            webhook_sent INTEGER DEFAULT 0,
+            data TEXT
+        );
+
+        -- Module configuration
+        CREATE TABLE IF NOT EXISTS module_config (
+            module TEXT PRIMARY KEY,
+            config TEXT NOT NULL,
+            enabled INTEGER DEFAULT 1,
+            last_run TIMESTAMP,
+            next_run TIMESTAMP,
+            interval_seconds INTEGER DEFAULT 3600
+        );
+
+        -- Proxy table
+        CREATE TABLE IF NOT EXISTS proxies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            proxy_string TEXT NOT NULL UNIQUE,
+            last_used TIMESTAMP,
+            success_count INTEGER DEFAULT 0,
+            fail_count INTEGER DEFAULT 0,
+            enabled INTEGER DEFAULT 1
+        );
+
+        -- Tasks queue
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_type TEXT NOT NULL,
+            module TEXT NOT NULL,
+            priority INTEGER DEFAULT 5,
+            data TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            scheduled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            completed_at TIMESTAMP,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            max_attempts INTEGER DEFAULT 3,
+            result TEXT,
+            error TEXT
+        );
+
+        -- Create index for task processing
+        CREATE INDEX IF NOT EXISTS idx_tasks_status_priority ON tasks(status, priority);
+        CREATE INDEX IF NOT EXISTS idx_tasks_module ON tasks(module);
+        CREATE INDEX IF NOT EXISTS idx_tasks_pending ON tasks(priority DESC, scheduled_at) WHERE status = 'pending';
+        CREATE INDEX IF NOT EXISTS idx_tasks_pending_module ON tasks(module, priority DESC, scheduled_at) WHERE status = 'pending';
+
+        -- Session cookies
+        CREATE TABLE IF NOT EXISTS cookies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            module TEXT NOT NULL,
+            domain TEXT NOT NULL,
+            cookies TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP,
+            UNIQUE(module, domain)
+        );
+
+        -- Log table for debugging and metrics
+        CREATE TABLE IF NOT EXISTS logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            level TEXT NOT NULL,
+            module TEXT,
+            message TEXT NOT NULL,
+            data TEXT
+        );
+
+        -- Create index for log filtering
+        CREATE INDEX IF NOT EXISTS idx_logs_level ON logs(level);
+        CREATE INDEX IF NOT EXISTS idx_logs_module ON logs(module);
+        CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp);
+
+        -- Webhook configurations
+        CREATE TABLE IF NOT EXISTS webhooks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            url TEXT NOT NULL,
+            type TEXT NOT NULL,
+            enabled INTEGER DEFAULT 1,
+            config TEXT,
+            UNIQUE(name)
+        );
+
+        -- Webhook event subscriptions
+        CREATE TABLE IF NOT EXISTS webhook_subscriptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            webhook_id INTEGER REFERENCES webhooks(id) ON DELETE CASCADE,
+            event_type TEXT NOT NULL,
+            module TEXT,
+            filter TEXT,
+            UNIQUE(webhook_id, event_type, module)
+        );
+
+        -- User-defined search queries
+        CREATE TABLE IF NOT EXISTS search_queries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            module TEXT NOT NULL,
+            name TEXT NOT NULL,
+            url TEXT NOT NULL,
+            enabled INTEGER DEFAULT 1,
+            interval_seconds INTEGER DEFAULT 3600,
+            last_run TIMESTAMP,
+            next_run TIMESTAMP,
+            UNIQUE(module, name)
+        );
+
+        COMMIT;
+        """
+
+        with self.acquire() as (conn, cursor):
+            cursor.executescript(schema_sql)
+        logger.info("Initialized SQLite database schema")
+
+    def disconnect(self):
+        super().disconnect()
+        with self._stock_cache_lock:
+            self._stock_cache.clear()
+
+    def _run_maintenance(self, vacuum_due: bool):
+        with self.acquire() as (conn, cursor):
+            cursor.execute("ANALYZE")
+            cursor.execute("PRAGMA optimize")
+            if vacuum_due:
+                cursor.execute("PRAGMA incremental_vacuum(1000)")
+                cursor.fetchall()
+
+    def _cached_stock(self, pid: str) -> Optional[bool]:
+        """Get a product's last known stock status, or None if it isn't cached"""
+        with self._stock_cache_lock:
+            in_stock = self._stock_cache.get(pid)
+            if in_stock is not None:
+                self._stock_cache.move_to_end(pid)
+            return in_stock
+
+    def _remember_stock(self, pid: str, in_stock: bool):
+        """Record a product's stock status, evicting the least recently used entry if full"""
+        with self._stock_cache_lock:
+            self._stock_cache[pid] = bool(in_stock)
+            self._stock_cache.move_to_end(pid)
+            if len(self._stock_cache) > STOCK_CACHE_SIZE:
+                self._stock_cache.popitem(last=False)
+
+    def _forget_stock(self, *pids: str):
+        """Drop products from the stock cache"""
+        with self._stock_cache_lock:
+            for pid in pids:
+                self._stock_cache.pop(pid, None)
+
+    def _new_cursor(self, connection):
+        # Connections use sqlite3.Row, which supports mapping access
+        return connection.cursor()
+
+    def _json_param(self, value: Any) -> Any:
+        return _json_dumps(value)
+
+    def _bool_param(self, value: bool) -> Any:
+        return 1 if value else 0
+
+    def _json_value(self, value: Any) -> Any:
+        return _json_loads(value)
+
+    def _inserted_id(self, cursor) -> int:
+        return cursor.lastrowid
+
+    def _now(self) -> Any:
+        # Same text format CURRENT_TIMESTAMP produces
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    def _product_from_row(self, row) -> Dict[str, Any]:
+        product = dict(row)
+
+        # Parse JSON data, matching the decoded JSONB Postgres returns
+        if product.get("data"):
+            try:
+                product["data"] = _json_loads(product["data"])
+            except Exception:
+                product["data"] = {}
+
+        # Convert SQLite boolean to Python boolean
+        product["in_stock"] = bool(product["in_stock"])
+
+        return product
+
+    def _upsert_products(self, cursor, products: List[Dict[str, Any]], now: Any):
+        rows = [
+            (
+                product["pid"],
+                product["title"],
+                product.get("price"),
+                product.get("url"),
+                product.get("image_url"),
+                1 if product.get("in_stock", False) else 0,
+                _json_dumps(product.get("data", {})),
+                product["module"],
+                now,
+                now
+            )
+            for product in products
+        ]
+        sql = """
+        INSERT INTO products 
+            (pid, title, price, url, image_url, in_stock, data, module, first_seen, last_check)
+        VALUES 
+            (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (pid) DO UPDATE
+        SET 
+            title = excluded.title,
+            price = excluded.price,
+            url = excluded.url,
+            image_url = excluded.image_url,
+            in_stock = excluded.in_stock,
+            data = excluded.data,
+            last_check = excluded.last_check
+        """
+        cursor.executemany(sql, rows)
+
+        for product in products:
+            self._remember_stock(product["pid"], product.get("in_stock", False))
+
+    def _swap_stock_status(self, cursor, pid: str, in_stock: bool, now: Any) -> Optional[bool]:
+        stamp_column = "last_in_stock" if in_stock else "last_out_of_stock"
+
+        update_sql = f"""
+        UPDATE products
+        SET in_stock = ?, {stamp_column} = ?, last_check = ?
+        WHERE pid = ?
+        """
+        params = (1 if in_stock else 0, now, now, pid)
+
+        # With a cached status, skip the SELECT: the UPDATE only matches if the
+        # row still has that status, so a change by another writer isn't missed
+        cached_in_stock = self._cached_stock(pid)
+        if cached_in_stock is not None:
+            cursor.execute(update_sql + " AND in_stock = ?", params + (1 if cached_in_stock else 0,))
+            if cursor.rowcount:
+                self._remember_stock(pid, in_stock)
+                return cached_in_stock
+            self._forget_stock(pid)
+
+        # Get current stock status to check for changes
+        cursor.execute("SELECT in_stock FROM products WHERE pid = ?", (pid,))
+        result = cursor.fetchone()
+
+        if not result:
+            return None
+
+        current_in_stock = bool(result[0])
+
+        # Update product status
+        cursor.execute(update_sql, params)
+
+        self._remember_stock(pid, in_stock)
+        return current_in_stock
+
+    def _upsert_availability(self, cursor, rows: List[Tuple]):
+        cursor.executemany("""
+        INSERT INTO product_availability (pid, store_id, available, check_time)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (pid, store_id) DO UPDATE
+        SET available = excluded.available, check_time = excluded.check_time
+        """, rows)
+
+    def _insert_stores(self, cursor, rows: List[Tuple]) -> Dict[Tuple[str, str], int]:
+        if not self.has_returning:
+            cursor.executemany("""
+            INSERT INTO stores (
+                store_id, name, address, city, state, zip,
+                phone, latitude, longitude, module
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (store_id, module) DO NOTHING
+            """, rows)
+            return self._lookup_store_ids(cursor, [(row[0], row[-1]) for row in rows])
+
+        # Ten parameters per store, kept under SQLite's 999 variable limit
+        results = []
+        row_values = "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        for start in range(0, len(rows), STORE_INSERT_BATCH):
+            batch = rows[start:start + STORE_INSERT_BATCH]
+            cursor.execute(
+                INSERT_STORES_SQL.format(values=", ".join([row_values] * len(batch))),
+                [param for row in batch for param in row]
+            )
+            results.extend(cursor.fetchall())
+
+        return {(row[0], row[1]): row[2] for row in results}
+
+    def _claim_tasks(self, cursor, module: Optional[str], limit: int) -> List[Any]:
+        if self.has_returning:
+            return super()._claim_tasks(cursor, module, limit)
+
+        # Without RETURNING, take the write lock up front so no other
+        # connection can claim the same tasks between the SELECT and the UPDATE
+        next_sql, params = self._next_tasks_query(module, limit)
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(next_sql.format(columns=TASK_COLUMNS), params)
+        rows = cursor.fetchall()
+        cursor.executemany(self._sql["start_task"], [(row["id"],) for row in rows])
+        # Match what RETURNING reports: attempts includes this one
+        return [dict(row, attempts=row["attempts"] + 1) for row in rows]
+
+    def _failed_task_status(self, cursor, task_id: int) -> Optional[Tuple[str, int]]:
+        if self.has_returning:
+            return super()._failed_task_status(cursor, task_id)
+        if not cursor.rowcount:
+            return None
+        cursor.execute(self._sql["get_task_status"], (task_id,))
+        return cursor.fetchone()
+
+    def _write_logs(self, cursor, rows: List[Tuple]):
+        cursor.executemany(self._sql["log_event"], rows)
+
+
+class AsyncDatabase:
+    """
+    Awaitable front end for Database
+
+    Each call runs the matching Database method on a worker thread, so
+    coroutines can overlap database work with network requests. The
+    connection pool lets several of these calls run at once.
+
+    Example:
+        db = AsyncDatabase(config)
+        product = await db.get_product(pid)
+    """
+
+    def __init__(self, config: Dict[str, Any] = None, database: Database = None):
+        self.database = database or Database(config)
+
+    def __getattr__(self, name: str):
+        method = getattr(self.database, name)
+        # acquire() is a context manager and must stay synchronous
+        if name.startswith("_") or name == "acquire" or not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
 
 
 if __name__ == "__main__":
@@ -1303,7 +1978,8 @@ if __name__ == "__main__":
         "url": "https://www.booksamillion.com/p/Solo-Leveling-Comic/Chugong/9798400902550",
         "image_url": "https://covers3.booksamillion.com/covers/bam/9/79/840/090/9798400902550_m.jpg",
         "in_stock": True,
-        "module": "booksamillion"
+        "module": "booksamillion",
+        "data": {"format": "Paperback"}
     }
 
     db.add_product(test_product)
@@ -1315,6 +1991,7 @@ if __name__ == "__main__":
         print(f"  Title: {retrieved['title']}")
         print(f"  Price: ${retrieved['price']}")
         print(f"  In Stock: {retrieved['in_stock']}")
+        print(f"  Data: {json.dumps(retrieved['data'])}")
 
     # Test updating stock status
     store_data = {
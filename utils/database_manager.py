@@ -1577,8 +1577,8 @@ def get_database(config: Optional[Dict[str, Any]] = None) -> Union[DatabaseManag
             return DatabaseManager(config)
         else:
             logger.warning("PostgreSQL selected but psycopg2 not available, falling back to SQLite")
-            config["type"] = "sqlite"
-            return DatabaseManager(config)
+            # Copy rather than modify the caller's config
+            return DatabaseManager({**config, "type": "sqlite"})
     else:
         return DatabaseManager(config)
 